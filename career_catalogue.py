@@ -0,0 +1,19 @@
+import json
+import os
+from functools import lru_cache
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# The hand-written career catalogues. The CLI (main.py) and the GUI (career_gui.py)
+# have always shipped their own wording and career lists, so each keeps its own file.
+CATALOGUE_FILE = os.path.join(DATA_DIR, 'career_catalogue.json')
+GUI_CATALOGUE_FILE = os.path.join(DATA_DIR, 'gui_career_catalogue.json')
+
+
+@lru_cache(maxsize=None)
+def load_catalogue(path=CATALOGUE_FILE):
+    """
+    Reads the career catalogue once per process. Callers share the returned list,
+    so it must be treated as read-only.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -4,46 +4,18 @@ from tkinter.scrolledtext import ScrolledText
 import json
 import re
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from difflib import get_close_matches
+from functools import lru_cache
+from career_catalogue import GUI_CATALOGUE_FILE, load_catalogue
 
 # --------------------------------------------------------------------------
 # MODULE 1: DATABASE
 # --------------------------------------------------------------------------
-CAREER_PATHS = [
-    {
-        "name": "Software Engineer (Backend)",
-        "description": "Builds and maintains the server-side logic of web applications.",
-        "keywords": {
-            "strengths": ["problem-solving", "logical thinking", "analytical", "coding", "debugging"],
-            "interests": ["coding", "technology", "building things", "puzzles", "software"],
-            "academic": ["computer science", "engineering", "mathematics", "software"]
-        },
-        "skills_to_acquire": ["Proficiency in a backend language (Python, Java, Go)", "Database Management (SQL, NoSQL)", "API Design", "Cloud Computing (AWS, Azure)"],
-        "resources": ["Coursera: 'Google IT Automation with Python'", "Book: 'Designing Data-Intensive Applications'"]
-    },
-    {
-        "name": "Data Scientist",
-        "description": "Uses data to answer complex questions and make predictions.",
-        "keywords": {
-            "strengths": ["analytical", "statistics", "math", "problem-solving", "coding", "curiosity"],
-            "interests": ["data", "statistics", "machine learning", "research", "patterns"],
-            "academic": ["statistics", "computer science", "mathematics", "physics", "economics"]
-        },
-        "skills_to_acquire": ["Python (Pandas, NumPy, Scikit-learn)", "SQL", "Statistical Modeling", "Machine Learning Concepts", "Data Visualization"],
-        "resources": ["Coursera: 'IBM Data Science Professional Certificate'", "Kaggle.com for practical projects"]
-    },
-    {
-        "name": "UX/UI Designer",
-        "description": "Designs the user interface and experience for digital products.",
-        "keywords": {
-            "strengths": ["creative", "empathy", "visual design", "communication", "user research"],
-            "interests": ["art", "design", "psychology", "technology", "drawing"],
-            "academic": ["design", "psychology", "human-computer interaction", "art"]
-        },
-        "skills_to_acquire": ["Figma or Sketch", "User Research Methods", "Wireframing & Prototyping", "Understanding of Color Theory and Typography"],
-        "resources": ["Coursera: 'Google UX Design Professional Certificate'", "Nielsen Norman Group website for articles"]
-    }
-]
+# Loaded once at import and shared read-only with the background worker.
+CAREER_PATHS = load_catalogue(GUI_CATALOGUE_FILE)
 
 # --------------------------------------------------------------------------
 # MODULE 2: CORE LOGIC
@@ -53,27 +25,47 @@ def fuzzy_match(word, keyword_list, weight):
     matches = get_close_matches(word, keyword_list, n=1, cutoff=0.7)
     return weight if matches else 0
 
-def analyze_user_data(user_data):
-    """Analyzes user data and returns scored career recommendations."""
-    scored_careers = []
+# Strengths count most, then interests, then academic background.
+FIELD_WEIGHTS = {'strengths': 3, 'interests': 2, 'academic': 1}
+
+@lru_cache(maxsize=256)
+def score_field(field, values):
+    """
+    Scores one profile field against every career, returning one score per career.
+    Results are cached per field value, so re-scoring after an edit only
+    recomputes the field that actually changed.
+    """
+    scores = []
     for career in CAREER_PATHS:
-        score = 0
-        # Strengths (weight: 3)
-        for s in user_data.get('strengths', []):
-            score += fuzzy_match(s, career['keywords']['strengths'], 3)
-
-        # Interests (weight: 2)
-        for i in user_data.get('interests', []):
-            score += fuzzy_match(i, career['keywords']['interests'], 2)
-
-        # Academic (weight: 1)
-        for keyword in career['keywords']['academic']:
-            if keyword in user_data.get('academic_background', '').lower():
-                score += 1
-
-        if score > 0:
-            scored_careers.append({"career": career, "score": score})
-
+        keywords = career['keywords'][field]
+        if field == 'academic':
+            # values is the academic background as a single-item tuple
+            background = values[0].lower() if values else ''
+            scores.append(sum(1 for keyword in keywords if keyword in background))
+        else:
+            scores.append(sum(fuzzy_match(v, keywords, FIELD_WEIGHTS[field]) for v in values))
+    return tuple(scores)
+
+def analyze_user_data(user_data, is_cancelled=None):
+    """
+    Analyzes user data and returns scored career recommendations.
+    Returns None if is_cancelled() becomes true part-way through.
+    """
+    fields = {
+        'strengths': tuple(user_data.get('strengths', [])),
+        'interests': tuple(user_data.get('interests', [])),
+        'academic': (user_data.get('academic_background', ''),),
+    }
+    totals = [0] * len(CAREER_PATHS)
+    for field, values in fields.items():
+        if is_cancelled and is_cancelled():
+            return None
+        totals = [t + s for t, s in zip(totals, score_field(field, values))]
+
+    scored_careers = [
+        {"career": career, "score": score}
+        for career, score in zip(CAREER_PATHS, totals) if score > 0
+    ]
     return sorted(scored_careers, key=lambda x: x['score'], reverse=True)
 
 def generate_roadmap_data(recommendation, user_data):
@@ -109,8 +101,73 @@ def generate_roadmap_data(recommendation, user_data):
     }
 
 # --------------------------------------------------------------------------
-# MODULE 3: GUI APPLICATION
+# MODULE 3: BACKGROUND WORKER
+# --------------------------------------------------------------------------
+class RecommendationWorker:
+    """
+    Runs scoring (and saving the profile) off the Tk main loop.
+
+    Every submit() starts a new generation; jobs from older generations are
+    cancelled if still queued, stop early if already running, and their results
+    are dropped by poll(). Tk widgets are only ever touched from the main thread.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="career-scoring")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = None
+        self._pending_saves = False
+
+    def submit(self, user_data, save_path=None):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            # A queued job that still has to save the profile is left to run
+            if self._pending is not None and not self._pending_saves:
+                self._pending.cancel()
+            self._pending = self._executor.submit(self._run, generation, dict(user_data), save_path)
+            self._pending_saves = bool(save_path)
+        return generation
+
+    def _is_stale(self, generation):
+        return generation != self._generation
+
+    def _run(self, generation, user_data, save_path):
+        try:
+            if save_path:
+                with open(save_path, "w") as f:
+                    json.dump(user_data, f, indent=4)
+            recommendations = analyze_user_data(user_data, lambda: self._is_stale(generation))
+            if recommendations is not None:
+                self._results.put((generation, user_data, recommendations, None))
+        except Exception as e:
+            self._results.put((generation, user_data, None, e))
+
+    def poll(self):
+        """Returns the newest finished (user_data, recommendations, error), or None."""
+        latest = None
+        while True:
+            try:
+                generation, user_data, recommendations, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if not self._is_stale(generation):
+                latest = (user_data, recommendations, error)
+        return latest
+
+    def shutdown(self):
+        with self._lock:
+            self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# --------------------------------------------------------------------------
+# MODULE 4: GUI APPLICATION
 # --------------------------------------------------------------------------
+POLL_INTERVAL_MS = 50
+RESCORE_DEBOUNCE_MS = 400
+
 class CareerApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -118,8 +175,12 @@ class CareerApp(tk.Tk):
         self.geometry("650x700")
         self.recommendations = []
         self.user_data = {}
+        self.worker = RecommendationWorker()
+        self._rescore_job = None
         self.create_widgets()
         self.load_user_data()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(POLL_INTERVAL_MS, self.poll_results)
 
     def create_widgets(self):
         style = ttk.Style(self)
@@ -168,6 +229,18 @@ class CareerApp(tk.Tk):
         self.results_listbox.pack(fill="both", expand=True)
         self.results_listbox.bind("<<ListboxSelect>>", self.show_roadmap)
 
+        # Re-score live (debounced) while the user is still typing
+        for entry in (self.study_entry, self.interests_entry, self.strengths_entry):
+            entry.bind("<KeyRelease>", self.schedule_rescore)
+
+    def read_profile(self):
+        return {
+            'academic_background': self.study_entry.get(),
+            'interests': [i.strip().lower() for i in self.interests_entry.get().split(',') if i.strip()],
+            'strengths': [s.strip().lower() for s in self.strengths_entry.get().split(',') if s.strip()],
+            'time_commitment': self.time_entry.get()
+        }
+
     def generate_recommendations(self):
         academic = self.study_entry.get()
         interests = self.interests_entry.get()
@@ -178,19 +251,38 @@ class CareerApp(tk.Tk):
             messagebox.showerror("Error", "Please fill out all fields.")
             return
 
-        self.user_data = {
-            'academic_background': academic,
-            'interests': [i.strip().lower() for i in interests.split(',')],
-            'strengths': [s.strip().lower() for s in strengths.split(',')],
-            'time_commitment': time
-        }
-
-        # Save for persistence
-        with open("last_user.json", "w") as f:
-            json.dump(self.user_data, f, indent=4)
-
-        self.recommendations = analyze_user_data(self.user_data)
-
+        self.cancel_scheduled_rescore()
+        # Scoring and saving to last_user.json both happen on the worker thread
+        self.worker.submit(self.read_profile(), save_path="last_user.json")
+
+    def schedule_rescore(self, event=None):
+        self.cancel_scheduled_rescore()
+        self._rescore_job = self.after(RESCORE_DEBOUNCE_MS, self.rescore_live)
+
+    def cancel_scheduled_rescore(self):
+        if self._rescore_job is not None:
+            self.after_cancel(self._rescore_job)
+            self._rescore_job = None
+
+    def rescore_live(self):
+        self._rescore_job = None
+        profile = self.read_profile()
+        if profile['interests'] or profile['strengths']:
+            self.worker.submit(profile)
+
+    def poll_results(self):
+        result = self.worker.poll()
+        if result is not None:
+            user_data, recommendations, error = result
+            if error is not None:
+                messagebox.showerror("Error", f"Could not generate recommendations: {error}")
+            else:
+                self.user_data = user_data
+                self.show_recommendations(recommendations)
+        self.after(POLL_INTERVAL_MS, self.poll_results)
+
+    def show_recommendations(self, recommendations):
+        self.recommendations = recommendations
         self.results_listbox.delete(0, tk.END)
         if not self.recommendations:
             self.results_listbox.insert(tk.END, "No strong matches found.")
@@ -207,6 +299,11 @@ class CareerApp(tk.Tk):
         roadmap_data = generate_roadmap_data(selected_recommendation, self.user_data)
         RoadmapWindow(self, roadmap_data)
 
+    def on_close(self):
+        self.cancel_scheduled_rescore()
+        self.worker.shutdown()
+        self.destroy()
+
     def load_user_data(self):
         if os.path.exists("last_user.json"):
             try:
@@ -1,64 +1,12 @@
 import json
 import re
 import os
+from career_catalogue import load_catalogue
 
 # --------------------------------------------------------------------------
 # MODULE 1: CAREER DATABASE
 # --------------------------------------------------------------------------
-CAREER_PATHS = [
-    {
-        "name": "Software Engineer (Backend)",
-        "description": "Builds and maintains the server-side logic of web applications.",
-        "keywords": {
-            "strengths": ["problem-solving", "logical thinking", "analytical", "coding", "debugging"],
-            "interests": ["coding", "technology", "building things", "puzzles", "software"],
-            "personality": ["analytical", "introverted", "detail-oriented", "patient"],
-            "academic": ["computer science", "engineering", "mathematics", "software"],
-            "industries": ["tech", "software development", "IT"]
-        },
-        "skills_to_acquire": ["Python or Java", "Database Management (SQL/NoSQL)", "API Design", "Cloud Computing (AWS/Azure)"],
-        "resources": ["Coursera: 'Google IT Automation with Python'", "Book: 'Designing Data-Intensive Applications'"]
-    },
-    {
-        "name": "Data Scientist",
-        "description": "Uses data to answer complex questions and make predictions.",
-        "keywords": {
-            "strengths": ["analytical", "statistics", "math", "problem-solving", "coding", "curiosity"],
-            "interests": ["data", "statistics", "machine learning", "research", "patterns"],
-            "personality": ["curious", "analytical", "patient", "methodical"],
-            "academic": ["statistics", "computer science", "mathematics", "physics", "economics"],
-            "industries": ["tech", "finance", "analytics"]
-        },
-        "skills_to_acquire": ["Python (Pandas, NumPy, Scikit-learn)", "SQL", "Statistical Modeling", "Machine Learning Concepts", "Data Visualization"],
-        "resources": ["Coursera: 'IBM Data Science Professional Certificate'", "Kaggle.com for practical projects"]
-    },
-    {
-        "name": "UX/UI Designer",
-        "description": "Designs the user interface and experience for digital products.",
-        "keywords": {
-            "strengths": ["creative", "empathy", "visual design", "communication", "user research"],
-            "interests": ["art", "design", "psychology", "technology", "drawing"],
-            "personality": ["creative", "empathetic", "collaborative", "visual"],
-            "academic": ["design", "psychology", "human-computer interaction", "art"],
-            "industries": ["tech", "design", "gaming", "advertising"]
-        },
-        "skills_to_acquire": ["Figma or Sketch", "User Research Methods", "Wireframing & Prototyping", "Color Theory & Typography"],
-        "resources": ["Coursera: 'Google UX Design Professional Certificate'", "Nielsen Norman Group website"]
-    },
-    {
-        "name": "IT Project Manager",
-        "description": "Plans, executes, and closes technology projects.",
-        "keywords": {
-            "strengths": ["leadership", "organization", "communication", "planning", "problem-solving"],
-            "interests": ["management", "technology", "business", "strategy"],
-            "personality": ["organized", "outgoing", "decisive", "leader"],
-            "academic": ["business", "management", "information systems", "computer science"],
-            "industries": ["tech", "business", "finance", "IT"]
-        },
-        "skills_to_acquire": ["Agile & Scrum methodologies", "Project Management Software (Jira, Asana)", "Risk Management", "Budgeting"],
-        "resources": ["Google Project Management Professional Certificate", "PMBOK Guide"]
-    }
-]
+CAREER_PATHS = load_catalogue()
 
 # --------------------------------------------------------------------------
 # MODULE 2: USER INPUT
@@ -144,9 +92,27 @@ def generate_timeline(skills, time_commitment):
         start_week = end_week + 1
     return timeline
 
+def find_colleges(career, user_data, top_k=3):
+    """
+    Suggests colleges for a career within the user's budget, if the college index is available.
+    Returns (colleges, budget in INR or None if no budget could be read).
+    """
+    try:
+        from src.query_colleges import get_colleges_for_text, parse_budget_inr
+    except ImportError:
+        return [], None
+    budget = parse_budget_inr(user_data['constraints']['financial'])
+    try:
+        colleges = get_colleges_for_text(f"{career['name']}: {career['description']}", top_k,
+                                         max_budget=budget, cost_weight=0.2 if budget else 0.0)
+    except (OSError, RuntimeError):
+        return [], None
+    return colleges, budget
+
 def generate_roadmap_data(recommendation, user_data):
     career = recommendation['career']
     timeline = generate_timeline(career.get('skills_to_acquire', []), user_data['constraints']['time'])
+    colleges, college_budget = find_colleges(career, user_data)
     return {
         "career_name": career['name'],
         "match_score": recommendation['score'],
@@ -155,7 +121,9 @@ def generate_roadmap_data(recommendation, user_data):
         "fit_reason": f"Matches strengths: {', '.join(user_data['strengths'])}, interests: {', '.join(user_data['interests'])}, personality: {', '.join(user_data['personality_traits'])}.",
         "timeline_title": f"Your {user_data['constraints']['time']} Skill Development Plan",
         "timeline": timeline,
-        "resources": career.get('resources', [])
+        "resources": career.get('resources', []),
+        "colleges": colleges,
+        "college_budget_inr": college_budget
     }
 
 def display_roadmap(roadmap_data):
@@ -172,6 +140,13 @@ def display_roadmap(roadmap_data):
     print("\n📚 Recommended Resources:")
     for res in roadmap_data['resources']:
         print(f"   - {res}")
+    budget = roadmap_data.get('college_budget_inr')
+    if roadmap_data['colleges']:
+        print("\n🏫 Colleges Within Your Budget:" if budget else "\n🏫 Suggested Colleges:")
+        for college in roadmap_data['colleges']:
+            print(f"   - {college['name']} ({college['city']}) ~ ₹{college['total_cost_per_year_inr']:,}/year")
+    elif budget:
+        print(f"\n🏫 No colleges found within ₹{budget:,.0f}/year.")
     print("="*50)
 
 def save_roadmaps_to_json(all_roadmaps):
@@ -1,12 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 import os
-import json
+import threading
 import faiss
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from index_bundle import BundleWatcher, IndexBundle, BUNDLE_DIR
+from sharding import ShardCoordinator, ShardVersionError, SHARDS_DIR
+from profile_store import ProfileStore, PROFILES_DIR, profile_fingerprint
+from tokenization import CachedTokenizer, render_template
+from reranker import CareerReranker, FEATURES_FILE, RETRIEVE_CANDIDATES, weights_from_env
+from query_colleges import get_colleges_for_text, parse_budget_inr
+from fast_response import FastJSONResponse, build_fragments, recommendations_body
+from roadmap import RoadmapEngine, MATRICES_FILE, DEFAULT_TIME_COMMITMENT, DEFAULT_STEPS
 
 # --- 1. SETUP & LOADING AI MODELS ---
 
@@ -32,92 +40,311 @@ MODEL_NAME = 'all-MiniLM-L6-v2'
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
 INDEX_FILE = os.path.join(RESULTS_DIR, 'onet_faiss.index')
 ONET_JSON_FILE = os.path.join(RESULTS_DIR, 'onet_processed.json')
+BUNDLE_POLL_SECONDS = float(os.environ.get('BUNDLE_POLL_SECONDS', '10'))
+
+# The watcher owns the active search bundle (index + careers + model) and swaps in
+# newer versions written by semantic_index.py without restarting the server.
+def prepare_bundle(bundle):
+    """Pre-serialises each career's static response fields once per bundle."""
+    bundle.fragments = build_fragments(bundle.careers)
+
+bundle_watcher = BundleWatcher(SentenceTransformer, BUNDLE_DIR, BUNDLE_POLL_SECONDS, on_activate=prepare_bundle)
 
 try:
     print("Loading AI model, career data, and search index. This may take a moment...")
-    # Load the sentence transformer model
-    model = SentenceTransformer(MODEL_NAME)
-    
-    # Load the FAISS index (our AI's "brain")
-    index = faiss.read_index(INDEX_FILE)
-    
-    # Load the career metadata
-    with open(ONET_JSON_FILE, 'r') as f:
-        CAREER_PATHS = json.load(f)
-        
-    print(f"✅ AI models and data loaded successfully. {len(CAREER_PATHS)} careers ready.")
-
+    if not bundle_watcher.check_for_update():
+        # No bundle built yet: fall back to the separate index and JSON files
+        bundle_watcher.activate(IndexBundle.load_legacy(INDEX_FILE, ONET_JSON_FILE, MODEL_NAME))
+    print(f"✅ AI models and data loaded successfully. {len(bundle_watcher.active.careers)} careers ready.")
 except Exception as e:
     print(f"[FATAL ERROR] Could not load AI models or data files: {e}")
-    model = None
-    index = None
-    CAREER_PATHS = []
+
+bundle_watcher.start()
+
+# --- Optional coordinator mode ---
+# SHARD_URLS=http://node1:8100,http://node2:8100 fans queries out to shard_worker.py
+# instances; LOCAL_SHARDS=1 starts one local process per shard in results/shards.
+SHARD_URLS = [url for url in os.environ.get('SHARD_URLS', '').split(',') if url]
+coordinator = None
+try:
+    if SHARD_URLS:
+        coordinator = ShardCoordinator.from_urls(SHARD_URLS, on_activate=prepare_bundle)
+    elif os.environ.get('LOCAL_SHARDS'):
+        coordinator = ShardCoordinator.from_local_shards(SHARDS_DIR, on_activate=prepare_bundle, poll_interval=BUNDLE_POLL_SECONDS)
+    if coordinator is not None:
+        active = bundle_watcher.active
+        same_model = active is not None and active.model_name == coordinator.model_name
+        coordinator.model = active.model if same_model else SentenceTransformer(coordinator.model_name)
+        print(f"✅ Coordinator mode: {len(coordinator.shards)} shards, {coordinator.count} careers.")
+except Exception as e:
+    print(f"[FATAL ERROR] Could not start coordinator mode: {e}")
+    coordinator = None
+
+def current_bundle():
+    """Returns the active searcher; callers should hold on to it for the whole request."""
+    return coordinator or bundle_watcher.active
+
+try:
+    # The roadmap matrices are optional; recommendations still work without them.
+    roadmap_engine = RoadmapEngine.load(MATRICES_FILE)
+    print(f"✅ Roadmap engine loaded for {len(roadmap_engine.soc_codes)} occupations.")
+except Exception as e:
+    print(f"[WARNING] Roadmap engine unavailable: {e}")
+    roadmap_engine = None
+
+try:
+    # Optional second stage: re-rank FAISS candidates with structured O*NET features
+    reranker = CareerReranker.load(FEATURES_FILE, weights_from_env())
+    print(f"✅ Re-ranker loaded with weights {reranker.weights}.")
+except Exception as e:
+    print(f"[WARNING] Re-ranker unavailable, using raw semantic scores: {e}")
+    reranker = None
+
+TOP_K = 5
+
+# --- Returning users ---
+# One store per model name, since vectors from different models are not comparable.
+_profile_stores = {}
+_profile_stores_lock = threading.Lock()
+
+def profile_store_for(bundle):
+    with _profile_stores_lock:
+        store = _profile_stores.get(bundle.model_name)
+        if store is None:
+            directory = os.path.join(PROFILES_DIR, bundle.model_name.replace('/', '_'))
+            store = ProfileStore(bundle.model.get_sentence_embedding_dimension(), directory)
+            _profile_stores[bundle.model_name] = store
+        return store
 
 # --- 2. DEFINE DATA MODELS ---
 
 class UserProfile(BaseModel):
+    user_id: Optional[str] = Field(None, description="Lets returning users reuse their stored profile.")
     academic_background: str
     interests: List[str]
     strengths: List[str]
     personality_traits: List[str]
     preferred_industries: List[str]
+    preferred_job_zone: Optional[int] = Field(None, ge=1, le=5, description="O*NET Job Zone (1-5) the user is aiming for.")
 
 class CareerRecommendation(BaseModel):
+    onet_soc_code: str
     title: str
     description: str
-    match_score: float = Field(..., description="A similarity score (0-1) from the AI model.")
+    match_score: float = Field(..., description="A similarity score (0-1) from the AI model, re-ranked with O*NET career features when available.")
+
+class SimilarChoice(BaseModel):
+    onet_soc_code: str
+    title: str
+    students: int = Field(..., description="How many similar students were recommended this career.")
+
+class CollegeQuery(BaseModel):
+    query: str = Field(..., description="What the student wants to study, e.g. a career title.")
+    top_k: int = Field(3, ge=1, le=20)
+    max_budget_inr: Optional[float] = Field(None, gt=0, description="Maximum total cost per year.")
+    financial_constraint: Optional[str] = Field(None, description="Free-text budget such as '3 lakh', used if max_budget_inr is not set.")
+    states: List[str] = []
+    cities: List[str] = []
+    cost_weight: float = Field(0.0, ge=0, description="How strongly cheaper colleges are preferred.")
+
+class CollegeMatch(BaseModel):
+    id: str
+    name: str
+    city: str
+    state: str
+    programs: str
+    url: str
+    total_cost_per_year_inr: int
+    match_score: float
+
+class RoadmapRequest(BaseModel):
+    onet_soc_code: str
+    strengths: List[str] = []
+    time_commitment: str = Field(DEFAULT_TIME_COMMITMENT, description="e.g. '6 weeks', '3 months' or '1 year'.")
+    steps: int = Field(DEFAULT_STEPS, ge=1, le=20)
+
+class RoadmapStep(BaseModel):
+    skill: str
+    category: str
+    importance: float
+    level: float
+    gap_score: float = Field(..., description="How much this skill still needs work (0-1).")
+    start_week: int
+    end_week: int
+
+class Roadmap(BaseModel):
+    onet_soc_code: str
+    title: str
+    timeline_title: str
+    total_weeks: int
+    existing_strengths: List[str] = Field(..., description="Skills the user's strengths fully cover.")
+    timeline: List[RoadmapStep]
 
 # --- 3. THE NEW AI-POWERED LOGIC ---
 
+QUERY_TEMPLATE = ("A person with an academic background in {academic_background}, "
+                  "with interests in {interests}. Their strengths are {strengths}, "
+                  "and their personality is {personality_traits}.")
+
+def query_values(user_profile: UserProfile) -> dict:
+    return {
+        "academic_background": user_profile.academic_background,
+        "interests": user_profile.interests,
+        "strengths": user_profile.strengths,
+        "personality_traits": user_profile.personality_traits,
+    }
+
 def create_user_query(user_profile: UserProfile) -> str:
     """
     Combines the user's profile into a single, rich string for the AI to understand.
     """
-    interests_str = ", ".join(user_profile.interests)
-    strengths_str = ", ".join(user_profile.strengths)
-    personality_str = ", ".join(user_profile.personality_traits)
-    
-    return (f"A person with an academic background in {user_profile.academic_background}, "
-            f"with interests in {interests_str}. Their strengths are {strengths_str}, "
-            f"and their personality is {personality_str}.")
+    return render_template(QUERY_TEMPLATE, query_values(user_profile))
+
+# One fragment-caching tokenizer per model; template words and common
+# interests/strengths are then tokenized only once per process.
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+def tokenizer_for(bundle):
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(bundle.model_name)
+        if tokenizer is None or tokenizer.model is not bundle.model:
+            tokenizer = CachedTokenizer(bundle.model)
+            _tokenizers[bundle.model_name] = tokenizer
+        return tokenizer
+
+def encode_user_query(bundle, user_profile: UserProfile) -> np.ndarray:
+    """
+    Embeds the user's query from cached token fragments, skipping string
+    building and re-tokenizing the constant template on every request.
+    """
+    tokenizer = tokenizer_for(bundle)
+    input_ids = tokenizer.ids_for_template(QUERY_TEMPLATE, query_values(user_profile))
+    return tokenizer.encode_ids([input_ids])
 
 # --- 4. DEFINE API ENDPOINTS ---
 
 @app.get("/", summary="Health Check")
 def read_root():
-    return {"message": f"Welcome to the AI Career Guidance API! {len(CAREER_PATHS)} careers loaded."}
+    bundle = current_bundle()
+    careers = (coordinator.count if coordinator else len(bundle.careers)) if bundle else 0
+    return {
+        "message": f"Welcome to the AI Career Guidance API! {careers} careers loaded.",
+        "index_version": bundle.version if bundle else None,
+        "model_name": bundle.model_name if bundle else None,
+    }
 
 @app.post("/recommend", response_model=List[CareerRecommendation], summary="Get AI-Powered Career Recommendations")
-def get_recommendations(user_profile: UserProfile):
+def get_recommendations(user_profile: UserProfile, request: Request):
     """
     This is our main endpoint. It now uses semantic search to find the best career matches.
+
+    The response is spliced together from pre-serialised career fragments and
+    returned directly, skipping response-model validation and the default encoder.
     """
-    if not all([model, index, CAREER_PATHS]):
-        return []
+    accept_encoding = request.headers.get('accept-encoding', '')
+    bundle = current_bundle()
+    if bundle is None:
+        return FastJSONResponse(b'[]')
 
     print("Received recommendation request with profile:", user_profile.dict())
-    
-    # 1. Create a rich query from the user's profile
-    query_text = create_user_query(user_profile)
-    
-    # 2. Convert the user query into a numerical embedding
-    query_embedding = model.encode([query_text], convert_to_numpy=True)
-    faiss.normalize_L2(query_embedding)
+    profile = user_profile.dict(exclude={'user_id'})
+    store = profile_store_for(bundle) if user_profile.user_id else None
+    stored = store.get(user_profile.user_id) if store else None
+
+    if stored is not None and stored[1]['fingerprint'] == profile_fingerprint(profile):
+        # Returning user with an unchanged profile: reuse their stored embedding
+        query_embedding = stored[0]
+    else:
+        # 1-2. Build the query from cached token fragments and embed it
+        query_embedding = encode_user_query(bundle, user_profile)
+        faiss.normalize_L2(query_embedding)
     
     # 3. Perform the AI similarity search
-    # We ask FAISS to find the top 5 most similar careers
-    distances, indices = index.search(query_embedding, 5)
+    # With a re-ranker, FAISS only shortlists candidates and the structured
+    # features decide the final top 5
+    try:
+        hits = bundle.search(query_embedding, TOP_K if reranker is None else RETRIEVE_CANDIDATES)
+    except ShardVersionError as e:
+        # Coordinator mode: the shards could not agree on a version to answer from
+        raise HTTPException(status_code=503, detail=f"Search index is being updated: {e}")
+    if reranker is not None:
+        user_features = reranker.user_features(
+            user_profile.interests,
+            user_profile.strengths,
+            user_profile.personality_traits,
+            user_profile.preferred_job_zone,
+        )
+        hits = reranker.rerank(hits, user_features, TOP_K)
     
     # 4. Format and return the results
-    recommendations = []
-    for score, idx in zip(distances[0], indices[0]):
-        career = CAREER_PATHS[idx]
-        recommendations.append({
-            "title": career['title'],
-            "description": career['description'],
-            "match_score": round(float(score), 2)
-        })
+    body = recommendations_body(hits, getattr(bundle, 'fragments', None))
+
+    if store is not None and (stored is None or stored[0] is not query_embedding):
+        served = [{"onet_soc_code": career['onet_soc_code'], "title": career['title']} for _, career in hits]
+        store.add(user_profile.user_id, query_embedding, profile, served)
         
-    print(f"Returning {len(recommendations)} AI-powered recommendations.")
-    return recommendations
+    print(f"Returning {len(hits)} AI-powered recommendations.")
+    return FastJSONResponse(body, accept_encoding)
+
+@app.get("/users/{user_id}/similar", response_model=List[SimilarChoice], summary="What Similar Students Chose")
+def get_similar_choices(user_id: str):
+    """
+    Looks up the user's stored profile vector and counts the careers recommended
+    to the nearest past profiles.
+    """
+    bundle = current_bundle()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="Search index is not loaded.")
+    stored = profile_store_for(bundle).get(user_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"No stored profile for user: {user_id}")
+
+    choices = profile_store_for(bundle).similar_choices(stored[0], exclude_user=user_id)
+    return [
+        {"onet_soc_code": career['onet_soc_code'], "title": career['title'], "students": count}
+        for career, count in choices
+    ]
+
+
+@app.post("/colleges", response_model=List[CollegeMatch], summary="Find Colleges Within a Budget and Location")
+def get_colleges(college_query: CollegeQuery):
+    """
+    Semantic college search restricted by yearly budget and location, optionally
+    re-ranked to favour cheaper colleges.
+    """
+    max_budget = college_query.max_budget_inr or parse_budget_inr(college_query.financial_constraint)
+    try:
+        return get_colleges_for_text(
+            college_query.query,
+            college_query.top_k,
+            max_budget=max_budget,
+            states=college_query.states,
+            cities=college_query.cities,
+            cost_weight=college_query.cost_weight,
+        )
+    except (OSError, RuntimeError) as e:
+        raise HTTPException(status_code=503, detail=f"College data is not available: {e}")
+
+
+@app.post("/roadmap", response_model=Roadmap, summary="Get a Skill-Gap Roadmap for a Career")
+def get_roadmap(request: RoadmapRequest):
+    """
+    Builds a prioritised learning plan from the career's O*NET skill/knowledge ratings,
+    skipping what the user already lists as strengths.
+    """
+    if roadmap_engine is None:
+        raise HTTPException(status_code=503, detail="Roadmap data is not loaded.")
+    if request.onet_soc_code not in roadmap_engine:
+        raise HTTPException(status_code=404, detail=f"Unknown career: {request.onet_soc_code}")
 
+    roadmap = roadmap_engine.build_roadmap(
+        request.onet_soc_code,
+        request.strengths,
+        request.time_commitment,
+        request.steps,
+    )
+    bundle = current_bundle()
+    career = bundle.careers_by_code.get(request.onet_soc_code, {}) if bundle else {}
+    roadmap['title'] = career.get('title', request.onet_soc_code)
+    return roadmap
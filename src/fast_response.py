@@ -0,0 +1,94 @@
+import gzip
+import json
+
+from fastapi import Response
+
+# orjson and brotli are optional speed-ups; the standard library covers both cases without them.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the savings don't pay for the CPU.
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def career_fragment(career) -> bytes:
+    """
+    Pre-serialises a career's static fields as the inside of a JSON object,
+    without braces, e.g. b'"onet_soc_code":"15-1252.00","title":...'.
+    Values are coerced to str here, so responses built from it need no validation.
+    """
+    body = dumps({
+        'onet_soc_code': str(career['onet_soc_code']),
+        'title': str(career['title']),
+        'description': str(career.get('description') or ''),
+    })
+    return body[1:-1]
+
+
+def build_fragments(careers) -> dict:
+    """Fragments for every career, keyed by SOC code. Built once per index bundle."""
+    return {str(career['onet_soc_code']): career_fragment(career) for career in careers}
+
+
+def recommendations_body(hits, fragments=None) -> bytes:
+    """
+    Splices pre-serialised career fragments and the per-request scores into a
+    JSON array matching List[CareerRecommendation].
+    """
+    parts = []
+    for score, career in hits:
+        fragment = fragments.get(career['onet_soc_code']) if fragments else None
+        if fragment is None:
+            fragment = career_fragment(career)
+        parts.append(b'{' + fragment + b',"match_score":' + dumps(round(float(score), 2)) + b'}')
+    return b'[' + b','.join(parts) + b']'
+
+
+def _accepted_encodings(accept_encoding):
+    accepted = set()
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(body: bytes, accept_encoding: str):
+    """Returns (body, content-encoding or None), preferring brotli, then gzip."""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), 'gzip'
+    return body, None
+
+
+class FastJSONResponse(Response):
+    """A response for JSON bytes that were already serialised, compressed if the client allows."""
+
+    media_type = 'application/json'
+
+    def __init__(self, body: bytes, accept_encoding: str = '', status_code: int = 200):
+        body, encoding = compress(body, accept_encoding)
+        headers = {'Vary': 'Accept-Encoding'}
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        super().__init__(content=body, status_code=status_code, headers=headers)
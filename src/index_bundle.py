@@ -0,0 +1,256 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+import faiss
+import numpy as np
+
+# --- Configuration ---
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+BUNDLE_DIR = os.path.join(RESULTS_DIR, 'bundles')
+BUNDLE_PREFIX = 'onet_bundle_'
+BUNDLE_SUFFIX = '.npz'
+BUNDLE_FORMAT = 1
+KEEP_BUNDLES = 3
+
+
+class BundleError(Exception):
+    """Raised when a bundle is missing, corrupt or fails its checksum."""
+
+
+def _current_umask():
+    # Linux reports the umask without changing it; elsewhere it can only be read
+    # by setting it, so it is put straight back
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def atomic_write_bytes(path, data):
+    """
+    Writes to a temporary file in the same directory and renames it into place,
+    so readers only ever see the old file or the complete new one. The file gets
+    the usual umask-based permissions rather than mkstemp's owner-only 0600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        os.fchmod(fd, 0o666 & ~_current_umask())
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path, obj, **kwargs):
+    atomic_write_bytes(path, json.dumps(obj, **kwargs).encode('utf-8'))
+
+
+def _checksum(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def new_version():
+    """Versions sort by name, so the newest bundle is simply the largest."""
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+
+
+def bundle_path(version, bundle_dir=BUNDLE_DIR):
+    return os.path.join(bundle_dir, f"{BUNDLE_PREFIX}{version}{BUNDLE_SUFFIX}")
+
+
+def write_bundle(index, careers, model_name, bundle_dir=BUNDLE_DIR, version=None, extra=None):
+    """
+    Packs the FAISS index, the career metadata (in index row order), the model
+    name and a checksum into one file, written atomically. Returns the version.
+    """
+    if index.ntotal != len(careers):
+        raise BundleError(f"Index has {index.ntotal} vectors but there are {len(careers)} careers.")
+
+    version = version or new_version()
+    index_bytes = faiss.serialize_index(index).tobytes()
+    careers_bytes = json.dumps(careers).encode('utf-8')
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': version,
+        'model_name': model_name,
+        'count': len(careers),
+        'dimension': index.d,
+        'sha256': _checksum(index_bytes, careers_bytes),
+        **(extra or {}),
+    }
+
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        manifest=np.frombuffer(json.dumps(manifest).encode('utf-8'), dtype=np.uint8),
+        index=np.frombuffer(index_bytes, dtype=np.uint8),
+        careers=np.frombuffer(careers_bytes, dtype=np.uint8),
+    )
+    atomic_write_bytes(bundle_path(version, bundle_dir), buffer.getvalue())
+    prune_bundles(bundle_dir)
+    return version
+
+
+def list_versions(bundle_dir=BUNDLE_DIR):
+    pattern = os.path.join(bundle_dir, f"{BUNDLE_PREFIX}*{BUNDLE_SUFFIX}")
+    names = (os.path.basename(p) for p in glob.glob(pattern))
+    return sorted(n[len(BUNDLE_PREFIX):-len(BUNDLE_SUFFIX)] for n in names)
+
+
+def latest_version(bundle_dir=BUNDLE_DIR):
+    versions = list_versions(bundle_dir)
+    return versions[-1] if versions else None
+
+
+def prune_bundles(bundle_dir=BUNDLE_DIR, keep=KEEP_BUNDLES):
+    """Deletes all but the newest `keep` bundles."""
+    for version in list_versions(bundle_dir)[:-keep]:
+        try:
+            os.remove(bundle_path(version, bundle_dir))
+        except FileNotFoundError:
+            pass
+
+
+class IndexBundle:
+    """
+    One immutable, self-consistent snapshot of the search data. Request handlers
+    take a reference to the active bundle once and use only that object, so a
+    swap in the middle of a request can never mix rows from two versions.
+    """
+
+    def __init__(self, version, model_name, index, careers, model=None, manifest=None):
+        self.version = version
+        self.model_name = model_name
+        self.index = index
+        self.careers = careers
+        self.careers_by_code = {career['onet_soc_code']: career for career in careers}
+        self.model = model
+        self.manifest = manifest or {}
+
+    def search(self, query_embedding, k):
+        """Returns (score, career) pairs for the top k rows, best first."""
+        distances, indices = self.index.search(query_embedding, k)
+        return [
+            (float(score), self.careers[idx])
+            for score, idx in zip(distances[0], indices[0]) if idx >= 0
+        ]
+
+    @classmethod
+    def load(cls, version, bundle_dir=BUNDLE_DIR):
+        try:
+            with np.load(bundle_path(version, bundle_dir)) as data:
+                manifest = json.loads(data['manifest'].tobytes())
+                index_bytes = data['index'].tobytes()
+                careers_bytes = data['careers'].tobytes()
+        except (OSError, KeyError, ValueError) as e:
+            raise BundleError(f"Could not read bundle {version}: {e}") from e
+
+        if manifest.get('format') != BUNDLE_FORMAT:
+            raise BundleError(f"Bundle {version} has unsupported format {manifest.get('format')}.")
+        if _checksum(index_bytes, careers_bytes) != manifest['sha256']:
+            raise BundleError(f"Bundle {version} failed its checksum.")
+
+        index = faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
+        careers = json.loads(careers_bytes)
+        if index.ntotal != len(careers):
+            raise BundleError(f"Bundle {version} has mismatched index and metadata.")
+        return cls(manifest['version'], manifest['model_name'], index, careers, manifest=manifest)
+
+    @classmethod
+    def load_legacy(cls, index_file, careers_file, model_name):
+        """Loads the old separate onet_faiss.index / onet_processed.json pair."""
+        index = faiss.read_index(index_file)
+        with open(careers_file, 'r') as f:
+            careers = json.load(f)
+        if index.ntotal != len(careers):
+            raise BundleError("Legacy index and metadata have different row counts.")
+        return cls('legacy', model_name, index, careers)
+
+
+class BundleWatcher:
+    """
+    Polls the bundle directory and hot-swaps in newer versions.
+
+    The new bundle (and its model, if the model name changed) is fully loaded
+    and verified before the single reference assignment that publishes it, so
+    in-flight requests keep using the bundle they started with.
+    """
+
+    def __init__(self, load_model, bundle_dir=BUNDLE_DIR, interval=10.0, on_activate=None):
+        self._load_model = load_model
+        self._on_activate = on_activate
+        self._bundle_dir = bundle_dir
+        self._interval = interval
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._rejected = set()
+        self.active = None
+
+    def activate(self, bundle):
+        with self._swap_lock:
+            current = self.active
+            if current is not None and current.model_name == bundle.model_name:
+                bundle.model = bundle.model or current.model
+            if bundle.model is None:
+                bundle.model = self._load_model(bundle.model_name)
+            if self._on_activate is not None:
+                # Derived per-bundle data is prepared before the bundle goes live
+                self._on_activate(bundle)
+            self.active = bundle
+        print(f"✅ Search bundle {bundle.version} active ({len(bundle.careers)} careers).")
+
+    def check_for_update(self):
+        """Loads and activates the newest bundle if it differs from the active one."""
+        version = latest_version(self._bundle_dir)
+        if version is None or version in self._rejected:
+            return False
+        if self.active is not None and self.active.version == version:
+            return False
+        try:
+            self.activate(IndexBundle.load(version, self._bundle_dir))
+        except BundleError as e:
+            print(f"[WARNING] Ignoring bundle {version}: {e}")
+            self._rejected.add(version)
+            return False
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"[WARNING] Bundle watcher error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='bundle-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval)
+            self._thread = None
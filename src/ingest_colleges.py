@@ -2,19 +2,50 @@ import pandas as pd
 import json
 from sentence_transformers import SentenceTransformer
 import faiss
+import numpy as np
 import os
 
 # Define file paths relative to the project root
-DATA_DIR = os.path.join('..', 'data')
-RESULTS_DIR = os.path.join('..', 'results')
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
 COLLEGES_CSV = os.path.join(DATA_DIR, 'colleges_seed.csv')
 EMB_INDEX_FILE = os.path.join(RESULTS_DIR, 'colleges_faiss.index')
 META_FILE = os.path.join(RESULTS_DIR, 'colleges_meta.json')
+NUMERIC_FILE = os.path.join(RESULTS_DIR, 'colleges_numeric.npz')
+
+COST_COLUMNS = [
+    'avg_tuition_per_year_inr',
+    'avg_accommodation_per_month_inr',
+    'avg_food_per_month_inr',
+    'other_costs_estimate_inr',
+]
 
 def build_text(row):
     """Combines relevant college info into a single string for the AI model."""
     return f"{row['name']} | {row['programs']} | {row['keywords']} | {row['city']}"
 
+def total_cost_per_year(df):
+    """Tuition plus twelve months of accommodation and food, plus other costs."""
+    costs = df[COST_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0)
+    return (costs['avg_tuition_per_year_inr']
+            + 12 * (costs['avg_accommodation_per_month_inr'] + costs['avg_food_per_month_inr'])
+            + costs['other_costs_estimate_inr'])
+
+def build_numeric_index(df):
+    """
+    Precomputes the arrays college search filters on, in FAISS row order:
+    total yearly cost, and state/city codes into sorted lists of names.
+    """
+    states, state_codes = np.unique(df['state'].fillna('').str.strip().str.lower(), return_inverse=True)
+    cities, city_codes = np.unique(df['city'].fillna('').str.strip().str.lower(), return_inverse=True)
+    return {
+        'total_cost': df['total_cost_per_year_inr'].to_numpy(dtype=np.float32),
+        'state_codes': state_codes.astype(np.int32),
+        'city_codes': city_codes.astype(np.int32),
+        'states': states.astype(str),
+        'cities': cities.astype(str),
+    }
+
 def main():
     """Reads the CSV, generates AI embeddings, and saves the search index."""
     print("Starting the ingestion process...")
@@ -31,6 +62,8 @@ def main():
         print("Please make sure 'colleges_seed.csv' is inside the 'data' folder.")
         return
 
+    df['total_cost_per_year_inr'] = total_cost_per_year(df).astype(int)
+
     # 2. Prepare text for the AI model
     texts = [build_text(row) for _, row in df.iterrows()]
 
@@ -52,6 +85,10 @@ def main():
     with open(META_FILE, "w") as f:
         json.dump(df.to_dict(orient="records"), f, indent=2)
     print(f"Metadata saved to {META_FILE}")
+
+    # 6. Save the numeric cost and location index used for filtering and re-ranking
+    np.savez(NUMERIC_FILE, **build_numeric_index(df))
+    print(f"Cost and location index saved to {NUMERIC_FILE}")
     
     print("\n✅ Ingestion complete. Your AI search index is ready!")
 
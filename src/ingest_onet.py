@@ -1,6 +1,8 @@
-import pandas as pd
 import os
-import json
+from index_bundle import atomic_write_json
+from onet_tables import load_table, TABLE_SCHEMAS, SOC_CODE
+from reranker import build_career_features, save_career_features, FEATURES_FILE
+from roadmap import build_skill_matrices, save_skill_matrices, MATRICES_FILE
 
 # --- Configuration ---
 # Define the paths to our data and where the results should go.
@@ -8,14 +10,8 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'onet_data')
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
 OUTPUT_JSON_FILE = os.path.join(RESULTS_DIR, 'onet_processed.json')
 
-# A dictionary to map the cryptic filenames to friendly names
-ONET_FILES = {
-    'occupations': 'Occupation Data.txt',
-    'tasks': 'Task Statements.txt',
-    'skills': 'Skills.txt',
-    'knowledge': 'Knowledge.txt',
-    'work_activities': 'Work Activities.txt'
-}
+# The O*NET tables combined into each career profile (see onet_tables.TABLE_SCHEMAS)
+ONET_TABLES = ['occupations', 'tasks', 'skills', 'knowledge', 'work_activities']
 
 def main():
     """
@@ -27,15 +23,13 @@ def main():
     # Ensure the results directory exists
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
-    # --- 1. Load the raw data files into Pandas DataFrames ---
-    print("Step 1: Loading raw data files...")
+    # --- 1. Load the typed tables (parsed once, then served from the Parquet cache) ---
+    print("Step 1: Loading O*NET tables...")
     try:
         dataframes = {}
-        for key, filename in ONET_FILES.items():
-            path = os.path.join(DATA_DIR, filename)
-            # O*NET files are tab-separated
-            dataframes[key] = pd.read_csv(path, sep='\t', on_bad_lines='warn')
-            print(f"  - Loaded {filename}")
+        for key in ONET_TABLES:
+            dataframes[key] = load_table(key, DATA_DIR)
+            print(f"  - Loaded {TABLE_SCHEMAS[key][0]}")
     except FileNotFoundError as e:
         print(f"\n[ERROR] A required file was not found: {e.filename}")
         print("Please ensure all O*NET .txt files are in the 'data/onet_data' folder.")
@@ -43,49 +37,44 @@ def main():
 
     # --- 2. Process and combine the data ---
     print("\nStep 2: Processing and combining data for each occupation...")
-    
-    # We'll use the main 'occupations' dataframe as our base
+
+    # Group each table by SOC code once, instead of re-filtering it for every occupation
+    def lists_by_code(table, column):
+        grouped = dataframes[table].groupby(SOC_CODE, observed=True)[column]
+        return {code: values.astype(str).tolist() for code, values in grouped}
+
+    tasks = lists_by_code('tasks', 'Task')
+    skills = lists_by_code('skills', 'Element Name')
+    knowledge = lists_by_code('knowledge', 'Element Name')
+    activities = lists_by_code('work_activities', 'Element Name')
+
     processed_careers = []
-    
-    # Let's iterate through each occupation in the main list
-    for index, occupation in dataframes['occupations'].iterrows():
-        onet_soc_code = occupation['O*NET-SOC Code']
-        
-        career_profile = {
+    for occupation in dataframes['occupations'].itertuples(index=False):
+        onet_soc_code = str(occupation[0])
+        processed_careers.append({
             'onet_soc_code': onet_soc_code,
-            'title': occupation['Title'],
-            'description': occupation['Description'],
-            'tasks': [],
-            'skills': [],
-            'knowledge': [],
-            'work_activities': []
-        }
-        
-        # Find all tasks for this occupation and add them to the profile
-        tasks_for_occupation = dataframes['tasks'][dataframes['tasks']['O*NET-SOC Code'] == onet_soc_code]
-        career_profile['tasks'] = tasks_for_occupation['Task'].tolist()
-        
-        # Find all skills for this occupation
-        skills_for_occupation = dataframes['skills'][dataframes['skills']['O*NET-SOC Code'] == onet_soc_code]
-        career_profile['skills'] = skills_for_occupation['Element Name'].tolist()
-        
-        # Find all knowledge areas for this occupation
-        knowledge_for_occupation = dataframes['knowledge'][dataframes['knowledge']['O*NET-SOC Code'] == onet_soc_code]
-        career_profile['knowledge'] = knowledge_for_occupation['Element Name'].tolist()
-        
-        # Find all work activities for this occupation
-        activities_for_occupation = dataframes['work_activities'][dataframes['work_activities']['O*NET-SOC Code'] == onet_soc_code]
-        career_profile['work_activities'] = activities_for_occupation['Element Name'].tolist()
-
-        processed_careers.append(career_profile)
+            'title': occupation.Title,
+            'description': occupation.Description,
+            'tasks': tasks.get(onet_soc_code, []),
+            'skills': skills.get(onet_soc_code, []),
+            'knowledge': knowledge.get(onet_soc_code, []),
+            'work_activities': activities.get(onet_soc_code, [])
+        })
 
     print(f"  - Successfully processed {len(processed_careers)} occupations.")
 
     # --- 3. Save the final, clean data to a JSON file ---
     print(f"\nStep 3: Saving the processed data to {OUTPUT_JSON_FILE}...")
-    with open(OUTPUT_JSON_FILE, 'w') as f:
-        json.dump(processed_careers, f, indent=2)
-        
+    atomic_write_json(OUTPUT_JSON_FILE, processed_careers, indent=2)
+
+    # --- 4. Precompute the skill/knowledge matrices for the roadmap engine ---
+    print(f"\nStep 4: Building skill-gap matrices in {MATRICES_FILE}...")
+    save_skill_matrices(build_skill_matrices(DATA_DIR))
+
+    # --- 5. Precompute the structured career features for the re-ranker ---
+    print(f"\nStep 5: Building re-ranking features in {FEATURES_FILE}...")
+    save_career_features(build_career_features(DATA_DIR))
+
     print("\n--- ✅ O*NET Data Ingestion Complete ---")
     print("Your new, powerful career database is ready!")
 
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from index_bundle import atomic_write_json
+
+# --- Configuration ---
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'onet_data')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+CACHE_DIR = os.path.join(RESULTS_DIR, 'onet_cache')
+MANIFEST_FILE = 'manifest.json'
+
+# Bump when a schema below changes, so every cached table is re-parsed once.
+SCHEMA_VERSION = 1
+
+SOC_CODE = 'O*NET-SOC Code'
+
+# --- Explicit schemas ---
+# Spelling the dtypes out skips pandas' type inference and keeps the repeated
+# codes and names as compact categoricals instead of Python strings.
+_RATING_COLUMNS = {
+    SOC_CODE: 'category',
+    'Element ID': 'category',
+    'Element Name': 'category',
+    'Scale ID': 'category',
+    'Data Value': 'float32',
+    'N': 'Int32',
+    'Standard Error': 'float32',
+    'Lower CI Bound': 'float32',
+    'Upper CI Bound': 'float32',
+    'Recommend Suppress': 'category',
+    'Not Relevant': 'category',
+    'Date': 'category',
+    'Domain Source': 'category',
+}
+
+TABLE_SCHEMAS = {
+    'occupations': ('Occupation Data.txt', {
+        SOC_CODE: 'category',
+        'Title': 'string',
+        'Description': 'string',
+    }),
+    'tasks': ('Task Statements.txt', {
+        SOC_CODE: 'category',
+        'Task ID': 'Int64',
+        'Task': 'string',
+        'Task Type': 'category',
+        'Incumbents Responding': 'Int32',
+        'Date': 'category',
+        'Domain Source': 'category',
+    }),
+    'skills': ('Skills.txt', _RATING_COLUMNS),
+    'knowledge': ('Knowledge.txt', _RATING_COLUMNS),
+    'work_activities': ('Work Activities.txt', _RATING_COLUMNS),
+    'work_styles': ('Work Styles.txt', _RATING_COLUMNS),
+    'work_values': ('Work Values.txt', _RATING_COLUMNS),
+    'interests': ('Interests.txt', _RATING_COLUMNS),
+    'job_zones': ('Job Zones.txt', {
+        SOC_CODE: 'category',
+        'Job Zone': 'Int8',
+        'Date': 'category',
+        'Domain Source': 'category',
+    }),
+    'riasec_keywords': ('RIASEC Keywords.txt', {
+        'Element ID': 'category',
+        'Element Name': 'category',
+        'Keyword': 'string',
+        'Keyword Type': 'category',
+    }),
+    'basic_interests': ('Basic Interests to RIASEC.txt', {
+        'Basic Interests Element ID': 'category',
+        'Basic Interests Element Name': 'string',
+        'RIASEC Element ID': 'category',
+        'RIASEC Element Name': 'category',
+    }),
+}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def parse_table(name, data_dir=DATA_DIR):
+    """Parses one raw O*NET .txt file with its explicit schema."""
+    filename, schema = TABLE_SCHEMAS[name]
+    path = os.path.join(data_dir, filename)
+    header = pd.read_csv(path, sep='\t', nrows=0).columns
+    dtypes = {column: dtype for column, dtype in schema.items() if column in header}
+    return pd.read_csv(path, sep='\t', dtype=dtypes, on_bad_lines='warn')
+
+
+def load_table(name, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    """
+    Returns a typed DataFrame for an O*NET table, served from a Parquet cache.
+
+    The cache entry is reused while the source file's size and mtime match. If
+    only the mtime changed, the file's sha256 is compared before re-parsing, so
+    touching or re-copying an unchanged file costs a hash, not a parse.
+    """
+    filename, _ = TABLE_SCHEMAS[name]
+    source = os.path.join(data_dir, filename)
+    stat = os.stat(source)  # raises FileNotFoundError for a missing table, like read_csv
+    cache_file = os.path.join(cache_dir, f"{name}.parquet")
+
+    manifest = _load_manifest(cache_dir)
+    entry = manifest.get(name, {})
+    fresh = entry.get('schema_version') == SCHEMA_VERSION and os.path.exists(cache_file)
+
+    if fresh and entry.get('size') == stat.st_size:
+        if entry.get('mtime') == stat.st_mtime:
+            return _read_cache(cache_file, name, data_dir)
+        digest = _file_sha256(source)
+        if entry.get('sha256') == digest:
+            entry['mtime'] = stat.st_mtime
+            _save_manifest_entry(cache_dir, name, entry)
+            return _read_cache(cache_file, name, data_dir)
+    else:
+        digest = _file_sha256(source)
+
+    df = parse_table(name, data_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+    except ImportError:
+        # Parquet needs pyarrow; without it we simply parse every time.
+        return df
+    _save_manifest_entry(cache_dir, name, {
+        'source': filename,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'sha256': digest,
+        'schema_version': SCHEMA_VERSION,
+    })
+    return df
+
+
+def _read_cache(cache_file, name, data_dir):
+    try:
+        return pd.read_parquet(cache_file)
+    except ImportError:
+        return parse_table(name, data_dir)
+
+
+def _save_manifest_entry(cache_dir, name, entry):
+    manifest = _load_manifest(cache_dir)
+    manifest[name] = entry
+    atomic_write_json(os.path.join(cache_dir, MANIFEST_FILE), manifest, indent=2)
+
+
+def load_tables(names, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    return {name: load_table(name, data_dir, cache_dir) for name in names}
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+import faiss
+import numpy as np
+
+from index_bundle import atomic_write_bytes
+
+# --- Configuration ---
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+PROFILES_DIR = os.path.join(RESULTS_DIR, 'profiles')
+VECTORS_FILE = 'vectors.f32'
+RECORDS_FILE = 'records.jsonl'
+MAX_PROFILES = 50000
+MAX_AGE_DAYS = 365
+# Going over max_profiles evicts the oldest users down to this share of it, so
+# the next size-triggered compaction is another 10% of new users away.
+LOW_WATER_MARK = 0.9
+
+
+def profile_fingerprint(profile: dict) -> str:
+    """A stable hash of a profile, used to tell if a returning user changed anything."""
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ProfileStore:
+    """
+    Append-only store of user profile embeddings and the careers served to them.
+
+    Vectors live in a flat float32 file (one row per visit) and records in a
+    JSON-lines file with the same row numbers. Every row is in the FAISS index
+    under its row number; a bitmap of each user's latest, unexpired row filters
+    searches, so a revisit only flips two bits. Superseded and expired rows are
+    dropped from disk by compact().
+    """
+
+    def __init__(self, dimension, directory=PROFILES_DIR, max_profiles=MAX_PROFILES, max_age_days=MAX_AGE_DAYS):
+        self.dimension = dimension
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self._vectors_path = os.path.join(directory, VECTORS_FILE)
+        self._records_path = os.path.join(directory, RECORDS_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    # --- Loading ---
+
+    def _finish_compaction(self):
+        """
+        Rolls an interrupted compaction forward. records.new is only written once
+        vectors.new is complete, so its presence means both new files are valid.
+        """
+        vectors_new, records_new = self._vectors_path + '.new', self._records_path + '.new'
+        if os.path.exists(records_new):
+            if os.path.exists(vectors_new):
+                os.replace(vectors_new, self._vectors_path)
+            os.replace(records_new, self._records_path)
+        elif os.path.exists(vectors_new):
+            os.remove(vectors_new)
+
+    def _load(self):
+        self._finish_compaction()
+        records = []
+        if os.path.exists(self._records_path):
+            with open(self._records_path, 'r') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # a torn final line from an interrupted append
+        vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        if os.path.exists(self._vectors_path):
+            vectors = np.fromfile(self._vectors_path, dtype=np.float32)
+            vectors = vectors[:len(vectors) - len(vectors) % self.dimension].reshape(-1, self.dimension)
+
+        # A crash between the two appends can leave one file a row ahead; trust the shorter.
+        rows = min(len(records), len(vectors))
+        self._records = records[:rows]
+        self._vectors = list(vectors[:rows])
+        self._latest = {}
+        for row, record in enumerate(self._records):
+            self._latest[record['user_id']] = row
+
+        # Index ids are simply row numbers, since rows are only ever appended
+        self._index = faiss.IndexFlatIP(self.dimension)
+        if rows:
+            self._index.add(np.ascontiguousarray(vectors[:rows]))
+        capacity = max(rows, 1024)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._live[list(self._latest.values())] = True
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._timestamps[:rows] = [record['timestamp'] for record in self._records]
+
+    def _mark_live(self, row, timestamp):
+        if row >= len(self._live):
+            self._live = np.concatenate([self._live, np.zeros(len(self._live), dtype=bool)])
+            self._timestamps = np.concatenate([self._timestamps, np.zeros(len(self._timestamps))])
+        self._live[row] = True
+        self._timestamps[row] = timestamp
+
+    def __len__(self):
+        return len(self._latest)
+
+    # --- Reading ---
+
+    def get(self, user_id):
+        """Returns (embedding, record) for a user's latest visit, or None."""
+        with self._lock:
+            row = self._latest.get(user_id)
+            if row is None:
+                return None
+            return self._vectors[row].reshape(1, -1), self._records[row]
+
+    def similar_choices(self, embedding, k=20, exclude_user=None, top_n=5):
+        """
+        Finds the k nearest past profiles and counts the careers they were served.
+        Returns [(career, number_of_similar_students)], most common first.
+        """
+        with self._lock:
+            # Only users' latest rows are candidates; superseded rows, and rows older
+            # than max_age_days that compaction has not dropped yet, are skipped by FAISS
+            total = self._index.ntotal
+            candidates = self._live[:total] & (self._timestamps[:total] >= time.time() - self.max_age_seconds)
+            count = int(candidates.sum())
+            if count == 0:
+                return []
+            bitmap = np.packbits(candidates, bitorder='little')
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+            _, rows = self._index.search(embedding, min(k + 1, count), params=params)
+            neighbours = [self._records[row] for row in rows[0] if row >= 0]
+
+        counts = Counter()
+        careers = {}
+        for record in neighbours:
+            if record['user_id'] == exclude_user:
+                continue
+            for career in record['results']:
+                counts[career['onet_soc_code']] += 1
+                careers[career['onet_soc_code']] = career
+        return [(careers[code], count) for code, count in counts.most_common(top_n)]
+
+    # --- Writing ---
+
+    def add(self, user_id, embedding, profile, results):
+        """Appends a visit and makes it the user's latest profile."""
+        vector = np.ascontiguousarray(embedding, dtype=np.float32).reshape(self.dimension)
+        record = {
+            'user_id': user_id,
+            'timestamp': time.time(),
+            'fingerprint': profile_fingerprint(profile),
+            'profile': profile,
+            'results': results,
+        }
+        with self._lock:
+            row = len(self._records)
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vector.tobytes())
+            with open(self._records_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+
+            previous = self._latest.get(user_id)
+            if previous is not None:
+                self._live[previous] = False
+            self._records.append(record)
+            self._vectors.append(vector)
+            self._latest[user_id] = row
+            self._index.add(vector.reshape(1, -1))
+            self._mark_live(row, record['timestamp'])
+
+            # Compact once superseded rows make up half the file, or the store is over
+            # budget; either way the next compaction is many requests away
+            if len(self._records) > 2 * max(len(self._latest), 1000) or len(self._latest) > self.max_profiles:
+                self._compact()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrites both files with only each user's latest row, dropping entries older
+        than max_age_days. Over max_profiles, the oldest users are evicted down to
+        the low-water mark rather than to the cap itself.
+        """
+        cutoff = time.time() - self.max_age_seconds
+        live = [row for row in self._latest.values() if self._records[row]['timestamp'] >= cutoff]
+        live.sort(key=lambda row: self._records[row]['timestamp'])
+        if len(live) > self.max_profiles:
+            live = live[len(live) - int(self.max_profiles * LOW_WATER_MARK):]
+
+        vectors = np.stack([self._vectors[row] for row in live]) if live else np.zeros((0, self.dimension), np.float32)
+        records = ''.join(json.dumps(self._records[row]) + '\n' for row in live)
+        atomic_write_bytes(self._vectors_path + '.new', vectors.astype(np.float32).tobytes())
+        atomic_write_bytes(self._records_path + '.new', records.encode('utf-8'))
+        self._load()
@@ -1,52 +1,135 @@
 import faiss
 import json
-from sentence_transformers import SentenceTransformer
+import re
+from functools import lru_cache
+import numpy as np
 import os
 
 # Define file paths
-RESULTS_DIR = os.path.join('..', 'results')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
 EMB_INDEX_FILE = os.path.join(RESULTS_DIR, 'colleges_faiss.index')
 META_FILE = os.path.join(RESULTS_DIR, 'colleges_meta.json')
+NUMERIC_FILE = os.path.join(RESULTS_DIR, 'colleges_numeric.npz')
 MODEL_NAME = "all-MiniLM-L6-v2"
 
-def get_colleges_for_text(query_text, top_k=3):
-    """Finds the top_k most relevant colleges for a given text query."""
-    
-    # 1. Load the AI model
+# How many extra candidates to pull from FAISS so cost re-ranking has room to work
+CANDIDATE_MULTIPLIER = 5
+
+_BUDGET_UNITS = {'k': 1e3, 'thousand': 1e3, 'lakh': 1e5, 'lakhs': 1e5, 'lac': 1e5, 'lacs': 1e5,
+                 'l': 1e5, 'lpa': 1e5, 'crore': 1e7, 'crores': 1e7, 'cr': 1e7}
+# Words that may follow a plain rupee amount without changing it
+_RUPEE_WORDS = {'rs', 'inr', 'rupee', 'rupees', 'per', 'a', 'pa', 'p', 'each', 'yearly', 'annually', 'max', 'only'}
+_AMOUNT = r'(\d[\d,]*(?:\.\d+)?)'
+_BUDGET_PATTERN = re.compile(_AMOUNT + r'(?:\s*(?:-|–|to)\s*' + _AMOUNT + r')?\s*([a-z]+)?')
+
+def parse_budget_inr(text):
+    """
+    Reads a yearly budget out of free text like '3 lakh', '250000', '2.5L per year',
+    '4-5 lakh' or '5 lpa', as collected by main.collect_user_data. Ranges count at
+    their upper bound. Amounts followed by an unknown word ('2 years of savings')
+    are ignored, and None is returned if no amount with a known unit is found.
+    """
+    if not text:
+        return None
+    budgets = []
+    for low, high, unit in _BUDGET_PATTERN.findall(text.lower()):
+        if unit in _BUDGET_UNITS:
+            multiplier = _BUDGET_UNITS[unit]
+        elif not unit or unit in _RUPEE_WORDS:
+            multiplier = 1
+        else:
+            continue
+        budgets.append(float((high or low).replace(',', '')) * multiplier)
+    return max(budgets) if budgets else None
+
+@lru_cache(maxsize=1)
+def load_resources():
+    """Loads the model, index, metadata and numeric arrays once per process."""
+    from sentence_transformers import SentenceTransformer
+
     model = SentenceTransformer(MODEL_NAME)
-    
-    # 2. Convert the query text into a numerical embedding
-    query_embedding = model.encode([query_text], convert_to_numpy=True)
-    faiss.normalize_L2(query_embedding)
-    
-    # 3. Load the search index and metadata
     index = faiss.read_index(EMB_INDEX_FILE)
     with open(META_FILE, "r") as f:
         meta = json.load(f)
-        
+    with np.load(NUMERIC_FILE) as data:
+        numeric = {key: data[key] for key in data.files}
+    return model, index, meta, numeric
+
+def filter_mask(numeric, max_budget=None, states=None, cities=None):
+    """Boolean mask over all colleges for the budget and location filters."""
+    mask = np.ones(len(numeric['total_cost']), dtype=bool)
+    if max_budget is not None:
+        mask &= numeric['total_cost'] <= max_budget
+    if states:
+        wanted = np.flatnonzero(np.isin(numeric['states'], [s.strip().lower() for s in states]))
+        mask &= np.isin(numeric['state_codes'], wanted)
+    if cities:
+        wanted = np.flatnonzero(np.isin(numeric['cities'], [c.strip().lower() for c in cities]))
+        mask &= np.isin(numeric['city_codes'], wanted)
+    return mask
+
+def get_colleges_for_text(query_text, top_k=3, max_budget=None, states=None, cities=None, cost_weight=0.0):
+    """
+    Finds the top_k most relevant colleges for a given text query.
+
+    Budget and location filters are applied as a mask before the FAISS search,
+    so only matching colleges are scored. With cost_weight > 0 the candidates
+    are re-ranked by similarity minus cost_weight * (cost / reference cost),
+    where the reference is the budget, or the most expensive college if none is set.
+    match_score is always the plain similarity; the cost penalty only affects order.
+    """
+
+    # 1. Load the AI model, search index and metadata (cached after the first call)
+    model, index, meta, numeric = load_resources()
+
+    # 2. Convert the query text into a numerical embedding
+    query_embedding = model.encode([query_text], convert_to_numpy=True)
+    faiss.normalize_L2(query_embedding)
+
+    # 3. Restrict the search to colleges that pass the filters
+    mask = filter_mask(numeric, max_budget, states, cities)
+    allowed = np.flatnonzero(mask)
+    if len(allowed) == 0:
+        return []
+    k = min(len(allowed), top_k * CANDIDATE_MULTIPLIER if cost_weight else top_k)
+    params = None
+    if len(allowed) < index.ntotal:
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed.astype(np.int64)))
+
     # 4. Perform the AI-powered search
-    distances, indices = index.search(query_embedding, top_k)
-    
-    # 5. Format and return the results
+    distances, indices = index.search(query_embedding, k, params=params)
+    scores, rows = distances[0], indices[0]
+    scores, rows = scores[rows >= 0], rows[rows >= 0]
+
+    # 5. Re-rank by cost if asked to
+    if cost_weight:
+        reference = max_budget or float(numeric['total_cost'].max()) or 1.0
+        ranking = scores - cost_weight * numeric['total_cost'][rows] / reference
+        order = np.argsort(-ranking, kind='stable')
+        scores, rows = scores[order], rows[order]
+
+    # 6. Format and return the results
     results = []
-    for score, idx in zip(distances[0], indices[0]):
-        college_info = meta[idx]
+    for score, idx in zip(scores[:top_k], rows[:top_k]):
+        college_info = dict(meta[idx])
+        college_info['total_cost_per_year_inr'] = int(numeric['total_cost'][idx])
         college_info['match_score'] = round(float(score), 2)
         results.append(college_info)
-        
+
     return results
 
 if __name__ == "__main__":
     # --- This is where you can test the recommender ---
     # Example: Let's find colleges for a career in design
     career_query = "A career in user experience and visual interface design"
-    
+
     print(f"Finding top colleges for the query: '{career_query}'\n")
-    
-    recommended_colleges = get_colleges_for_text(career_query)
-    
+
+    recommended_colleges = get_colleges_for_text(career_query, max_budget=parse_budget_inr("4 lakh"), cost_weight=0.2)
+
     for college in recommended_colleges:
         print(f"- {college['name']} (Score: {college['match_score']})")
         print(f"  Location: {college['city']}, {college['state']}")
         print(f"  Programs: {college['programs']}")
-        print("-" * 20)
\ No newline at end of file
+        print(f"  Estimated cost per year: ₹{college['total_cost_per_year_inr']:,}")
+        print("-" * 20)
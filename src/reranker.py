@@ -0,0 +1,206 @@
+import json
+import os
+from difflib import get_close_matches
+from functools import lru_cache
+
+import numpy as np
+
+from text_terms import content_words
+
+# --- Configuration ---
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'onet_data')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+FEATURES_FILE = os.path.join(RESULTS_DIR, 'onet_features.npz')
+
+RIASEC = ['Realistic', 'Investigative', 'Artistic', 'Social', 'Enterprising', 'Conventional']
+INTEREST_SCALE = ('OI', 1.0, 7.0)
+WORK_STYLE_SCALE = ('IM', 1.0, 5.0)
+WORK_VALUE_SCALE = ('EX', 1.0, 7.0)
+JOB_ZONES = (1, 5)
+
+# How much each signal counts towards the final score. Override with a JSON
+# object in the RERANK_WEIGHTS environment variable, e.g. '{"interests": 0.5}'.
+DEFAULT_WEIGHTS = {
+    'semantic': 1.0,
+    'interests': 0.3,
+    'work_styles': 0.15,
+    'work_values': 0.1,
+    'job_zone': 0.2,
+}
+RETRIEVE_CANDIDATES = 200
+
+def _scaled_pivot(df, scale, names):
+    """(occupation x element) array of one rating scale, rescaled to 0-1."""
+    import pandas as pd
+
+    df = df[df['Scale ID'] == scale[0]]
+    pivot = pd.pivot_table(
+        df.astype({'O*NET-SOC Code': str, 'Element Name': str}),
+        index='O*NET-SOC Code', columns='Element Name', values='Data Value', aggfunc='mean',
+    ).reindex(columns=names)
+    values = (pivot.to_numpy(dtype=np.float32) - scale[1]) / (scale[2] - scale[1])
+    return pivot.index.astype(str), np.nan_to_num(np.clip(values, 0, 1))
+
+
+def build_career_features(data_dir=DATA_DIR):
+    """
+    Precomputes per-occupation feature arrays (RIASEC interests, Work Styles,
+    Work Values, Job Zone) plus the vocabularies that map user words onto them.
+    """
+    import pandas as pd
+    from onet_tables import load_tables
+
+    tables = load_tables(
+        ['interests', 'work_styles', 'work_values', 'job_zones', 'riasec_keywords', 'basic_interests'],
+        data_dir,
+    )
+    style_names = sorted(tables['work_styles']['Element Name'].astype(str).unique())
+    value_names = sorted(
+        name for name in tables['work_values']['Element Name'].astype(str).unique()
+        if not name.endswith('High-Point')
+    )
+
+    parts = {
+        'riasec': _scaled_pivot(tables['interests'], INTEREST_SCALE, RIASEC),
+        'work_styles': _scaled_pivot(tables['work_styles'], WORK_STYLE_SCALE, style_names),
+        'work_values': _scaled_pivot(tables['work_values'], WORK_VALUE_SCALE, value_names),
+    }
+    job_zones = tables['job_zones'].astype({'O*NET-SOC Code': str}).set_index('O*NET-SOC Code')['Job Zone']
+
+    soc_codes = sorted(set().union(*(set(codes) for codes, _ in parts.values()), set(job_zones.index)))
+    features = {'soc_codes': np.array(soc_codes, dtype=str)}
+    for key, (codes, values) in parts.items():
+        frame = pd.DataFrame(values, index=codes).reindex(soc_codes).fillna(0)
+        features[key] = frame.to_numpy(dtype=np.float32)
+    features['job_zone'] = job_zones.reindex(soc_codes).astype('float32').to_numpy(na_value=np.nan)
+
+    # Words that point at each RIASEC type: O*NET's keywords and basic interest names
+    keywords = tables['riasec_keywords']
+    basic = tables['basic_interests']
+    riasec_terms = list(zip(keywords['Keyword'].astype(str), keywords['Element Name'].astype(str)))
+    riasec_terms += list(zip(basic['Basic Interests Element Name'].astype(str), basic['RIASEC Element Name'].astype(str)))
+    features['riasec_terms'] = np.array([term for term, _ in riasec_terms], dtype=str)
+    features['riasec_term_dims'] = np.array([RIASEC.index(name) for _, name in riasec_terms], dtype=np.int64)
+    features['work_style_names'] = np.array(style_names, dtype=str)
+    features['work_value_names'] = np.array(value_names, dtype=str)
+    return features
+
+
+def save_career_features(features, path=FEATURES_FILE):
+    np.savez_compressed(path, **features)
+
+
+class TermMatcher:
+    """
+    Maps free-text user terms onto feature dimensions by word overlap, with a
+    fuzzy fallback ('leader' -> 'Leadership'). Results are cached per term.
+    """
+
+    def __init__(self, phrases, dims, size):
+        self.size = size
+        self._dims_for_word = {}
+        for phrase, dim in zip(phrases, dims):
+            for word in content_words(phrase):
+                self._dims_for_word.setdefault(word, set()).add(int(dim))
+        self._vocabulary = list(self._dims_for_word)
+        self.term_vector = lru_cache(maxsize=4096)(self._term_vector)
+
+    def _term_vector(self, term):
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in content_words(term):
+            matches = [word] if word in self._dims_for_word else get_close_matches(word, self._vocabulary, n=1, cutoff=0.75)
+            for match in matches:
+                vector[list(self._dims_for_word[match])] = 1.0
+        return vector
+
+    def vector(self, terms):
+        total = np.zeros(self.size, dtype=np.float32)
+        for term in terms:
+            total += self.term_vector(term)
+        return total
+
+
+class CareerReranker:
+    """
+    Second retrieval stage: re-scores FAISS candidates against structured
+    per-occupation features with configurable weights. All candidate scoring is
+    a handful of vectorised gathers and dot products.
+    """
+
+    def __init__(self, features, weights=None):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self._row_for_code = {code: row for row, code in enumerate(features['soc_codes'])}
+
+        # Occupation RIASEC profiles are centred and unit-length, so a dot product
+        # with the user's vector rewards the *shape* of the profile, not its level.
+        riasec = features['riasec'] - features['riasec'].mean(axis=1, keepdims=True)
+        riasec /= np.maximum(np.linalg.norm(riasec, axis=1, keepdims=True), 1e-6)
+
+        # An extra all-zero row at the end is what unknown careers (row -1) index into.
+        def with_blank_row(array, fill=0.0):
+            blank = np.full((1,) + array.shape[1:], fill, dtype=np.float32)
+            return np.concatenate([array.astype(np.float32), blank])
+
+        self.riasec = with_blank_row(riasec)
+        self.work_styles = with_blank_row(features['work_styles'])
+        self.work_values = with_blank_row(features['work_values'])
+        self.job_zone = with_blank_row(features['job_zone'], np.nan)
+
+        self.interest_matcher = TermMatcher(features['riasec_terms'], features['riasec_term_dims'], len(RIASEC))
+        styles = features['work_style_names']
+        self.style_matcher = TermMatcher(styles, range(len(styles)), len(styles))
+        values = features['work_value_names']
+        self.value_matcher = TermMatcher(values, range(len(values)), len(values))
+
+    @classmethod
+    def load(cls, path=FEATURES_FILE, weights=None):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files}, weights)
+
+    def user_features(self, interests, strengths, personality_traits, preferred_job_zone=None):
+        """Turns the user's words into RIASEC, Work Style and Work Value vectors."""
+        riasec = self.interest_matcher.vector(list(interests) + list(strengths))
+        norm = np.linalg.norm(riasec)
+        if norm:
+            riasec /= norm
+        traits = list(personality_traits) + list(strengths)
+        styles = np.minimum(self.style_matcher.vector(traits), 1.0)
+        values = np.minimum(self.value_matcher.vector(traits), 1.0)
+        # Average over the styles/values the user named, so more words don't mean bigger scores
+        styles /= max(styles.sum(), 1.0)
+        values /= max(values.sum(), 1.0)
+        return riasec, styles, values, preferred_job_zone
+
+    def score(self, semantic_scores, soc_codes, user_features):
+        """Combined scores for candidate careers, in the same order as given."""
+        riasec, styles, values, preferred_job_zone = user_features
+        rows = np.fromiter((self._row_for_code.get(code, -1) for code in soc_codes), dtype=np.int64, count=len(soc_codes))
+        w = self.weights
+
+        total = w['semantic'] * np.asarray(semantic_scores, dtype=np.float32)
+        total += w['interests'] * (self.riasec[rows] @ riasec)
+        total += w['work_styles'] * (self.work_styles[rows] @ styles)
+        total += w['work_values'] * (self.work_values[rows] @ values)
+        if preferred_job_zone is not None:
+            distance = np.abs(self.job_zone[rows] - preferred_job_zone) / (JOB_ZONES[1] - JOB_ZONES[0])
+            total -= w['job_zone'] * np.nan_to_num(distance)
+        return total / sum(w.values())
+
+    def rerank(self, hits, user_features, k):
+        """Takes (semantic score, career) hits and returns the best k as (score, career)."""
+        if not hits:
+            return []
+        scores = self.score(
+            [score for score, _ in hits], [career['onet_soc_code'] for _, career in hits], user_features,
+        )
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(float(scores[i]), hits[i][1]) for i in order]
+
+
+def weights_from_env():
+    """Reads weight overrides from RERANK_WEIGHTS, ignoring unknown keys."""
+    raw = os.environ.get('RERANK_WEIGHTS')
+    if not raw:
+        return {}
+    overrides = json.loads(raw)
+    return {key: float(value) for key, value in overrides.items() if key in DEFAULT_WEIGHTS}
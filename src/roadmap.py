@@ -0,0 +1,240 @@
+import os
+import re
+from difflib import get_close_matches
+from functools import lru_cache
+
+import numpy as np
+
+from text_terms import content_words
+
+# --- Configuration ---
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'onet_data')
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+MATRICES_FILE = os.path.join(RESULTS_DIR, 'onet_skill_matrices.npz')
+
+# O*NET rates every element on two scales: Importance (IM, 1-5) and Level (LV, 0-7).
+ROADMAP_TABLES = {
+    'skill': 'skills',
+    'knowledge': 'knowledge',
+}
+IMPORTANCE_SCALE = ('IM', 1.0, 5.0)
+LEVEL_SCALE = ('LV', 0.0, 7.0)
+
+DEFAULT_TIME_COMMITMENT = '3 months'
+DEFAULT_STEPS = 6
+
+# Credit for a strength that shares some, but not all, words with an element.
+# Scaled by the share of the element's words it covers, so 'management' only
+# partly covers 'Management of Financial Resources'.
+WORD_OVERLAP_WEIGHT = 0.5
+
+
+def build_skill_matrices(data_dir=DATA_DIR):
+    """
+    Pivots the Skills and Knowledge tables into dense (occupation x element) arrays
+    of normalised importance and level, so a roadmap is just a few vector operations.
+    """
+    import pandas as pd
+    from onet_tables import load_table
+
+    frames = []
+    for category, table in ROADMAP_TABLES.items():
+        df = load_table(table, data_dir)
+        df = df[df['Scale ID'].isin([IMPORTANCE_SCALE[0], LEVEL_SCALE[0]])]
+        df = df[['O*NET-SOC Code', 'Element Name', 'Scale ID', 'Data Value']].astype(
+            {'O*NET-SOC Code': str, 'Element Name': str, 'Scale ID': str}
+        )
+        frames.append(df.assign(category=category))
+    ratings = pd.concat(frames, ignore_index=True)
+
+    pivot = ratings.pivot_table(
+        index='O*NET-SOC Code',
+        columns=['Scale ID', 'category', 'Element Name'],
+        values='Data Value',
+        aggfunc='mean',
+    )
+    elements = pivot[IMPORTANCE_SCALE[0]].columns
+    importance = pivot[IMPORTANCE_SCALE[0]].reindex(columns=elements).fillna(IMPORTANCE_SCALE[1]).to_numpy()
+    level = pivot[LEVEL_SCALE[0]].reindex(columns=elements).fillna(LEVEL_SCALE[1]).to_numpy()
+
+    # Scale both ratings to 0-1 so they can be multiplied into a single priority.
+    importance = (importance - IMPORTANCE_SCALE[1]) / (IMPORTANCE_SCALE[2] - IMPORTANCE_SCALE[1])
+    level = (level - LEVEL_SCALE[1]) / (LEVEL_SCALE[2] - LEVEL_SCALE[1])
+
+    return {
+        'soc_codes': pivot.index.to_numpy(dtype=str),
+        'categories': np.array([c for c, _ in elements], dtype=str),
+        'elements': np.array([e for _, e in elements], dtype=str),
+        'importance': np.clip(importance, 0, 1).astype(np.float32),
+        'level': np.clip(level, 0, 1).astype(np.float32),
+    }
+
+
+def save_skill_matrices(matrices, path=MATRICES_FILE):
+    np.savez_compressed(path, **matrices)
+
+
+_WEEKS_PER_UNIT = {'week': 1, 'wk': 1, 'month': 4, 'mo': 4, 'year': 52, 'yr': 52}
+
+
+def parse_total_weeks(time_commitment):
+    """
+    Turns free text like '6 weeks', '3 months' or '1.5 years' into a number of
+    weeks. A bare number counts as months, as in the CLI (defaults to 12 weeks).
+    """
+    match = re.search(r'(\d+(?:\.\d+)?)\s*([a-z]*)', (time_commitment or '').lower())
+    if not match:
+        return 12
+    unit = match.group(2).rstrip('s')
+    weeks_per_unit = _WEEKS_PER_UNIT.get(unit, _WEEKS_PER_UNIT['month'])
+    return max(1, round(float(match.group(1)) * weeks_per_unit))
+
+
+def allot_weeks(gap, total_weeks):
+    """
+    Splits total_weeks across len(gap) steps in proportion to gap, one week
+    minimum each. The spans always add up to exactly total_weeks.
+    """
+    spare = total_weeks - len(gap)
+    share = gap / gap.sum() * spare
+    weeks = np.floor(share).astype(int)
+    # Hand the weeks lost to rounding to the steps with the largest remainders
+    leftover = spare - int(weeks.sum())
+    weeks[np.argsort(-(share - weeks), kind='stable')[:leftover]] += 1
+    return weeks + 1
+
+
+class RoadmapEngine:
+    """
+    Builds skill-gap roadmaps from the precomputed O*NET skill/knowledge matrices.
+
+    The per-career base plan (element priorities) is cached, so each request only
+    applies the user's strengths as a cheap mask over that vector.
+    """
+
+    def __init__(self, matrices):
+        self.soc_codes = matrices['soc_codes']
+        self.categories = matrices['categories']
+        self.elements = matrices['elements']
+        self.importance = matrices['importance']
+        self.level = matrices['level']
+        self.priority = self.importance * self.level
+        self._row_for_code = {code: row for row, code in enumerate(self.soc_codes)}
+        self._element_keys = [e.lower() for e in self.elements]
+        self._element_words = [set(content_words(e)) for e in self.elements]
+        # The same name can appear in both Skills and Knowledge (e.g. 'Mathematics')
+        self._indices_for_key = {}
+        for i, key in enumerate(self._element_keys):
+            self._indices_for_key.setdefault(key, []).append(i)
+
+    @classmethod
+    def load(cls, path=MATRICES_FILE):
+        with np.load(path) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def __contains__(self, soc_code):
+        return soc_code in self._row_for_code
+
+    @lru_cache(maxsize=1024)
+    def base_plan(self, soc_code):
+        """Returns (element order, priorities) for a career, most important first."""
+        row = self._row_for_code[soc_code]
+        priority = self.priority[row]
+        order = np.argsort(-priority, kind='stable')
+        order = order[priority[order] > 0]
+        return order, priority[order]
+
+    @lru_cache(maxsize=4096)
+    def strength_mask(self, strengths):
+        """
+        Marks the elements a user already covers: 1.0 when the strength names every
+        word of the element, 0.5 for a close (fuzzy) match, a smaller partial credit
+        for sharing only some words (stopwords ignored) and 0.0 otherwise.
+        """
+        mask = np.zeros(len(self.elements), dtype=np.float32)
+        for strength in strengths:
+            strength = strength.strip().lower()
+            words = set(content_words(strength))
+            if not words:
+                continue
+            for i, key_words in enumerate(self._element_words):
+                shared = len(words & key_words)
+                if not shared:
+                    continue
+                if shared == len(key_words):
+                    mask[i] = 1.0
+                else:
+                    mask[i] = max(mask[i], WORD_OVERLAP_WEIGHT * shared / len(key_words))
+            for match in get_close_matches(strength, list(self._indices_for_key), n=3, cutoff=0.7):
+                for i in self._indices_for_key[match]:
+                    mask[i] = max(mask[i], 0.5)
+        return mask
+
+    def skill_gap(self, soc_code, strengths):
+        """
+        Returns element indices and gap scores, largest gap first, plus the
+        elements the user fully covers. Partly covered elements stay in the gap.
+        """
+        order, priority = self.base_plan(soc_code)
+        covered = self.strength_mask(tuple(sorted(strengths)))[order]
+        gap = priority * (1.0 - covered)
+        ranked = np.argsort(-gap, kind='stable')
+        ranked = ranked[gap[ranked] > 0]
+        return order[ranked], gap[ranked], order[covered >= 1.0]
+
+    def build_roadmap(self, soc_code, strengths, time_commitment=DEFAULT_TIME_COMMITMENT, steps=DEFAULT_STEPS):
+        """
+        Generates a timeline where weeks are shared out in proportion to each
+        skill's gap, instead of evenly across a fixed list. Every step gets at
+        least one week, so there are never more steps than weeks.
+        """
+        time_commitment = time_commitment or DEFAULT_TIME_COMMITMENT
+        total_weeks = parse_total_weeks(time_commitment)
+        gap_idx, gap, covered_idx = self.skill_gap(soc_code, strengths)
+        steps = max(0, min(steps, total_weeks))
+        gap_idx, gap = gap_idx[:steps], gap[:steps]
+
+        timeline = []
+        if len(gap_idx):
+            weeks = allot_weeks(gap, total_weeks)
+            start_week = 1
+            for element, score, span in zip(gap_idx, gap, weeks):
+                end_week = start_week + span - 1
+                timeline.append({
+                    'skill': str(self.elements[element]),
+                    'category': str(self.categories[element]),
+                    'importance': round(float(self.importance[self._row_for_code[soc_code], element]), 2),
+                    'level': round(float(self.level[self._row_for_code[soc_code], element]), 2),
+                    'gap_score': round(float(score), 3),
+                    'start_week': int(start_week),
+                    'end_week': int(end_week),
+                })
+                start_week = end_week + 1
+
+        return {
+            'onet_soc_code': soc_code,
+            'timeline_title': f"Your {time_commitment} Skill Development Plan",
+            'total_weeks': total_weeks,
+            'existing_strengths': [str(self.elements[i]) for i in covered_idx],
+            'timeline': timeline,
+        }
+
+
+def main():
+    """
+    Builds and saves the skill/knowledge matrices used by the /roadmap endpoint.
+    """
+    print("--- Building O*NET Skill-Gap Matrices ---")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    try:
+        matrices = build_skill_matrices()
+    except FileNotFoundError as e:
+        print(f"[ERROR] A required file was not found: {e.filename}")
+        return
+    save_skill_matrices(matrices)
+    print(f"✅ Saved {matrices['importance'].shape[1]} elements for "
+          f"{len(matrices['soc_codes'])} occupations to {MATRICES_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
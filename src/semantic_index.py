@@ -1,13 +1,16 @@
+import argparse
 import json
 import os
 import faiss
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from index_bundle import write_bundle, bundle_path, BUNDLE_DIR
+from tokenization import CachedTokenizer, tokenize_corpus, TOKENS_FILE
+from sharding import write_shard_bundles, SHARDS_DIR
 
 # --- Configuration ---
 RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
 ONET_JSON_FILE = os.path.join(RESULTS_DIR, 'onet_processed.json')
-INDEX_FILE = os.path.join(RESULTS_DIR, 'onet_faiss.index')
 
 # The name of the AI model we'll use from Hugging Face
 MODEL_NAME = 'all-MiniLM-L6-v2'
@@ -25,9 +28,10 @@ def create_text_for_embedding(career: dict) -> str:
     # Combine everything into a comprehensive paragraph
     return f"Career Title: {title}. Description: {description}. Common Tasks: {tasks}. Required Skills: {skills}."
 
-def main():
+def main(num_shards=1):
     """
     Main function to build and save the semantic search index.
+    With num_shards > 1 it also writes one bundle per shard for coordinator mode.
     """
     print("--- Starting AI Index Building Process ---")
     
@@ -48,11 +52,16 @@ def main():
     print(f"Step 3: Loading the '{MODEL_NAME}' AI model. This may take a few moments...")
     model = SentenceTransformer(MODEL_NAME)
     
+    # Reuse input ids saved by the previous build for any career text that hasn't changed
+    tokenizer = CachedTokenizer(model)
+    career_ids, cached = tokenize_corpus(tokenizer, career_texts, MODEL_NAME, TOKENS_FILE)
+    print(f"         Tokenized {len(career_texts)} careers ({cached} reused from {TOKENS_FILE}).")
+
     print("         Generating embeddings for all careers. This is the main AI processing step and will take some time...")
-    embeddings = model.encode(career_texts, show_progress_bar=True, convert_to_numpy=True)
+    embeddings = tokenizer.encode_ids(career_ids)
     print("         Embeddings generated successfully.")
 
-    # --- 4. Build and save the FAISS index ---
+    # --- 4. Build the FAISS index and save it as a versioned bundle ---
     # FAISS is a library for super-fast similarity search.
     embedding_dimension = embeddings.shape[1]
     index = faiss.IndexFlatIP(embedding_dimension) # Using Inner Product for similarity
@@ -61,11 +70,20 @@ def main():
     faiss.normalize_L2(embeddings)
     index.add(embeddings)
     
-    faiss.write_index(index, INDEX_FILE)
-    print(f"Step 4: FAISS index with {index.ntotal} vectors saved to {INDEX_FILE}.")
+    # The bundle keeps the index, the careers (in row order), the model name and a
+    # checksum in one atomically written file, so a running backend can hot-swap it.
+    version = write_bundle(index, careers, MODEL_NAME, BUNDLE_DIR)
+    print(f"Step 4: FAISS index with {index.ntotal} vectors saved as bundle {version} in {bundle_path(version)}.")
+
+    if num_shards > 1:
+        shard_version = write_shard_bundles(embeddings, careers, MODEL_NAME, num_shards, SHARDS_DIR)
+        print(f"         Also wrote {num_shards} shards (version {shard_version}) to {SHARDS_DIR}.")
 
     print("\n--- ✅ AI Index Building Complete ---")
     print("The AI has been trained on your career database.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Build the semantic search index.")
+    parser.add_argument('--shards', type=int, default=1, help="Also split the index into this many shards.")
+    args = parser.parse_args()
+    main(args.shards)
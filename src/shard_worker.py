@@ -0,0 +1,56 @@
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+import os
+import numpy as np
+from index_bundle import BundleError
+from sharding import ShardServer, shard_dir
+
+# --- 1. SETUP ---
+# Serves one index shard over HTTP for a backend running in coordinator mode.
+# Start one per shard, e.g.:  SHARD_ID=0 uvicorn shard_worker:app --port 8100
+
+SHARD_DIR = os.environ.get('SHARD_DIR') or shard_dir(int(os.environ.get('SHARD_ID', '0')))
+BUNDLE_POLL_SECONDS = float(os.environ.get('BUNDLE_POLL_SECONDS', '10'))
+
+app = FastAPI(
+    title="AI Career Guidance Shard Worker",
+    description="Searches one shard of the career index.",
+    version="1.0.0"
+)
+
+# Swaps in new shard bundles by itself, but keeps answering for the version the
+# coordinator pins until every shard has the new one.
+shard_server = ShardServer(SHARD_DIR, BUNDLE_POLL_SECONDS)
+try:
+    shard_server.start()
+except Exception as e:
+    print(f"[FATAL ERROR] Could not load shard from {SHARD_DIR}: {e}")
+
+# --- 2. DEFINE DATA MODELS ---
+
+class ShardQuery(BaseModel):
+    embedding: List[float]
+    k: int = 5
+    version: Optional[str] = None
+
+# --- 3. DEFINE API ENDPOINTS ---
+
+def _check_loaded():
+    if shard_server.watcher.active is None:
+        raise HTTPException(status_code=503, detail="Shard is not loaded.")
+
+@app.get("/shard/info", summary="Shard Version and Size")
+def get_info():
+    _check_loaded()
+    return shard_server.info()
+
+@app.post("/shard/search", summary="Top-k Search on This Shard")
+def post_search(query: ShardQuery):
+    _check_loaded()
+    query_embedding = np.asarray([query.embedding], dtype=np.float32)
+    try:
+        return shard_server.search(query_embedding, query.k, query.version)
+    except BundleError as e:
+        # The pinned version is no longer on disk; the coordinator re-syncs
+        raise HTTPException(status_code=409, detail=str(e))
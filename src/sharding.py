@@ -0,0 +1,415 @@
+import json
+import multiprocessing
+import os
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+from index_bundle import (
+    IndexBundle, BundleError, BundleWatcher, KEEP_BUNDLES, atomic_write_json, list_versions, new_version,
+    write_bundle,
+)
+
+# --- Configuration ---
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+SHARDS_DIR = os.path.join(RESULTS_DIR, 'shards')
+HTTP_TIMEOUT_SECONDS = 5.0
+SHARD_POLL_SECONDS = 10.0
+CAREERS_TABLE_PREFIX = 'careers_'
+
+
+class ShardVersionError(RuntimeError):
+    """Raised when the shards cannot all answer from the same index version."""
+
+
+def shard_dir(shard_id, shards_dir=SHARDS_DIR):
+    return os.path.join(shards_dir, f"shard_{shard_id:02d}")
+
+
+def list_shard_dirs(shards_dir=SHARDS_DIR):
+    if not os.path.isdir(shards_dir):
+        return []
+    return sorted(
+        os.path.join(shards_dir, name) for name in os.listdir(shards_dir) if name.startswith('shard_')
+    )
+
+
+def careers_table_path(version, shards_dir=SHARDS_DIR):
+    return os.path.join(shards_dir, f"{CAREERS_TABLE_PREFIX}{version}.json")
+
+
+def _prune_careers_tables(shards_dir, keep=KEEP_BUNDLES):
+    names = sorted(
+        name for name in os.listdir(shards_dir)
+        if name.startswith(CAREERS_TABLE_PREFIX) and name.endswith('.json')
+    )
+    for name in names[:-keep]:
+        try:
+            os.remove(os.path.join(shards_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def write_shard_bundles(embeddings, careers, model_name, num_shards, shards_dir=SHARDS_DIR):
+    """
+    Splits normalised embeddings into contiguous row ranges and writes each range
+    as its own bundle. Every shard records its global row offset, so merged
+    results can be tied back to the unsharded row order. The full careers table,
+    in global row order, is written alongside for the coordinator to hydrate
+    results from. Returns the version.
+    """
+    version = new_version()
+    # The table goes first, so a coordinator never sees shards it cannot hydrate
+    atomic_write_json(careers_table_path(version, shards_dir), {
+        'version': version,
+        'model_name': model_name,
+        'careers': careers,
+    })
+    ranges = np.array_split(np.arange(len(careers)), num_shards)
+    for shard_id, rows in enumerate(ranges):
+        start, stop = (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (0, 0)
+        index = faiss.IndexFlatIP(embeddings.shape[1])
+        index.add(embeddings[start:stop])
+        write_bundle(
+            index, careers[start:stop], model_name, shard_dir(shard_id, shards_dir), version,
+            extra={'shard_id': shard_id, 'num_shards': num_shards, 'row_offset': start},
+        )
+    _prune_careers_tables(shards_dir)
+    return version
+
+
+def load_careers_table(version, shards_dir=SHARDS_DIR):
+    """
+    Loads the careers written with a shard version, as an index-less bundle so
+    it offers the same careers / careers_by_code lookups as a full one.
+    """
+    try:
+        with open(careers_table_path(version, shards_dir), 'r') as f:
+            table = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BundleError(f"Could not read the careers table for shard version {version}: {e}") from e
+    return IndexBundle(table['version'], table['model_name'], None, table['careers'])
+
+
+def search_shard(bundle, query_embedding, k):
+    """
+    Top-k search on one shard, returning only scores and global row ids. Careers
+    are hydrated by the coordinator once the shard lists are merged.
+    """
+    offset = bundle.manifest.get('row_offset', 0)
+    distances, indices = bundle.index.search(query_embedding, min(k, bundle.index.ntotal))
+    keep = indices[0] >= 0
+    return {
+        'version': bundle.version,
+        'scores': distances[0][keep].tolist(),
+        'ids': (indices[0][keep] + offset).tolist(),
+    }
+
+
+def shard_info(bundle):
+    return {
+        'version': bundle.version,
+        'count': len(bundle.careers),
+        'model_name': bundle.model_name,
+        'shard_id': bundle.manifest.get('shard_id'),
+    }
+
+
+class ShardServer:
+    """
+    Serves one shard directory. The watcher hot-swaps in the newest bundle on its
+    own timer, but a search can pin any version still on disk, so a coordinator
+    can keep every shard on one version until all of them have the next one.
+
+    Besides the active bundle, one pinned version is kept loaded; normally that
+    is the bundle that was active just before the last swap. It also works as an
+    in-process shard client for ShardCoordinator.
+    """
+
+    def __init__(self, directory, poll_interval=SHARD_POLL_SECONDS):
+        self.name = directory
+        self._directory = directory
+        self._lock = threading.Lock()
+        self._pinned = None
+        # Shards never encode text, so no model is loaded here.
+        self.watcher = BundleWatcher(lambda model_name: None, directory, poll_interval, on_activate=self._keep_previous)
+
+    def _keep_previous(self, bundle):
+        previous = self.watcher.active
+        if previous is not None:
+            with self._lock:
+                self._pinned = previous
+
+    def start(self):
+        """Loads the newest bundle and starts polling. Returns whether a bundle is active."""
+        try:
+            self.watcher.check_for_update()
+        finally:
+            self.watcher.start()
+        return self.watcher.active is not None
+
+    def bundle(self, version=None):
+        """The active bundle, or the given version if a coordinator pinned an older one."""
+        active = self.watcher.active
+        if active is None:
+            raise BundleError(f"No shard bundle loaded from {self._directory}.")
+        if version is None or version == active.version:
+            return active
+        with self._lock:
+            if self._pinned is None or self._pinned.version != version:
+                # Raises BundleError once the version has been pruned
+                self._pinned = IndexBundle.load(version, self._directory)
+            return self._pinned
+
+    def info(self):
+        return dict(shard_info(self.bundle()), versions=list_versions(self._directory))
+
+    def search(self, query_embedding, k, version=None):
+        """search_shard on the requested version, plus the version this shard has live."""
+        result = search_shard(self.bundle(version), query_embedding, k)
+        result['latest'] = self.watcher.active.version
+        return result
+
+    def close(self):
+        self.watcher.stop()
+
+
+# --- Shard clients ---
+
+def _shard_process_main(conn, directory, poll_interval):
+    """
+    Entry point of a local shard process: answers search requests over a pipe and,
+    like shard_worker.py, hot-swaps in newer shard bundles as they are written.
+    """
+    server = ShardServer(directory, poll_interval)
+    if not server.start():
+        raise BundleError(f"No shard bundle found in {directory}.")
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        command, args = message
+        try:
+            if command == 'info':
+                conn.send(('ok', server.info()))
+            else:
+                conn.send(('ok', server.search(*args)))
+        except Exception as e:
+            conn.send(('error', str(e)))
+    server.close()
+    conn.close()
+
+
+class ProcessShard:
+    """A shard served by a local worker process."""
+
+    def __init__(self, directory, poll_interval=SHARD_POLL_SECONDS):
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_shard_process_main, args=(child_conn, directory, poll_interval), daemon=True,
+        )
+        self._process.start()
+        # Only the child keeps its end open, so a shard that dies shows up as EOFError
+        child_conn.close()
+        self._lock = threading.Lock()
+        self.name = directory
+
+    def _call(self, command, args=None):
+        with self._lock:
+            try:
+                self._conn.send((command, args))
+                status, payload = self._conn.recv()
+            except (EOFError, BrokenPipeError, OSError) as e:
+                raise RuntimeError(f"Shard {self.name} is not running: {e!r}") from e
+        if status != 'ok':
+            raise RuntimeError(f"Shard {self.name} failed: {payload}")
+        return payload
+
+    def info(self):
+        return self._call('info')
+
+    def search(self, query_embedding, k, version=None):
+        return self._call('search', (query_embedding, k, version))
+
+    def close(self):
+        try:
+            with self._lock:
+                self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=5)
+
+
+class HttpShard:
+    """A shard served by shard_worker.py on another node."""
+
+    def __init__(self, url, timeout=HTTP_TIMEOUT_SECONDS):
+        self.name = url.rstrip('/')
+        self._timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            f"{self.name}{path}", data=data, headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout) as response:
+            return json.loads(response.read())
+
+    def info(self):
+        return self._request('/shard/info')
+
+    def search(self, query_embedding, k, version=None):
+        return self._request('/shard/search', {'embedding': query_embedding[0].tolist(), 'k': k, 'version': version})
+
+    def close(self):
+        pass
+
+
+# --- Coordinator ---
+
+def merge_results(results, k):
+    """
+    Merges per-shard top-k lists into the global top k as (score, global row id)
+    pairs. All results must come from the same index version.
+
+    Equal scores are ordered by the lower global row id, so the order does not
+    depend on which shard answered first. FAISS leaves the order of equal scores
+    unspecified, so for exact ties this can differ from a single index; scores
+    and the set of rows at each score are the same.
+    """
+    versions = {r['version'] for r in results}
+    if len(versions) > 1:
+        raise ShardVersionError(f"Shards answered from different versions: {', '.join(sorted(versions))}.")
+    scores = np.array([s for r in results for s in r['scores']], dtype=np.float32)
+    ids = np.array([i for r in results for i in r['ids']], dtype=np.int64)
+    order = np.lexsort((ids, -scores))[:k]
+    return [(float(scores[i]), int(ids[i])) for i in order]
+
+
+class ShardCoordinator:
+    """
+    Fans a query out to every shard, then merges their top-k lists. Because each
+    shard is an exact IndexFlatIP over a disjoint row range, the merged result
+    is the same as searching the unsharded index (see merge_results for ties).
+
+    Every search pins the coordinator's current version, so shards that have
+    already swapped in a newer bundle still answer from the old one. Once all
+    shards report the same newer version live, the coordinator moves to it for
+    the following queries, so a rebuild never mixes versions or fails queries.
+
+    Shards only return scores and row ids; the merged winners are hydrated from
+    the careers table that write_shard_bundles saved for that version, which is
+    read from shards_dir on the coordinator's host.
+    """
+
+    def __init__(self, shards, model=None, shards_dir=SHARDS_DIR, on_activate=None):
+        if not shards:
+            raise ValueError("A coordinator needs at least one shard.")
+        self.shards = shards
+        self.model = model
+        self._shards_dir = shards_dir
+        self._on_activate = on_activate
+        self._swap_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix='shard-scatter')
+        self.table = None
+        self._sync_version()
+        self.model_name = self.table.model_name
+
+    @classmethod
+    def from_local_shards(cls, shards_dir=SHARDS_DIR, model=None, on_activate=None, poll_interval=SHARD_POLL_SECONDS):
+        shards = [ProcessShard(d, poll_interval) for d in list_shard_dirs(shards_dir)]
+        return cls(shards, model, shards_dir, on_activate)
+
+    @classmethod
+    def from_urls(cls, urls, model=None, shards_dir=SHARDS_DIR, on_activate=None):
+        return cls([HttpShard(url) for url in urls], model, shards_dir, on_activate)
+
+    # The active careers table stands in for a bundle's metadata
+    @property
+    def version(self):
+        return self.table.version
+
+    @property
+    def count(self):
+        return len(self.table.careers)
+
+    @property
+    def careers_by_code(self):
+        return self.table.careers_by_code
+
+    @property
+    def fragments(self):
+        return getattr(self.table, 'fragments', None)
+
+    def _activate(self, version):
+        """Returns the careers table for a version, loading and publishing it if new."""
+        table = self.table
+        if table is not None and table.version == version:
+            return table
+        with self._swap_lock:
+            if self.table is not None and self.table.version == version:
+                return self.table
+            table = load_careers_table(version, self._shards_dir)
+            if self.table is not None and table.model_name != self.table.model_name:
+                raise BundleError(
+                    f"Shard version {version} uses model {table.model_name}; restart the coordinator to switch models."
+                )
+            if self._on_activate is not None:
+                self._on_activate(table)
+            self.table = table
+        print(f"✅ Shard version {version} active ({len(table.careers)} careers).")
+        return table
+
+    def _sync_version(self):
+        """
+        Picks a version every shard can serve: the one they all have live if they
+        agree, otherwise the newest one still on disk everywhere.
+        """
+        infos = self._gather(lambda shard: shard.info())
+        live = {info['version'] for info in infos}
+        if len(live) == 1:
+            return self._activate(live.pop())
+        common = set.intersection(*(set(info['versions']) for info in infos))
+        if not common:
+            raise ShardVersionError(f"Shards have no version in common: {', '.join(sorted(live))}.")
+        return self._activate(max(common))
+
+    def _gather(self, call):
+        return list(self._pool.map(call, self.shards))
+
+    def _search_pinned(self, query_embedding, k):
+        """Returns (careers table searched, [(score, global row id)]) for the global top k."""
+        table = self.table
+        try:
+            results = self._gather(lambda shard: shard.search(query_embedding, k, table.version))
+        except (BundleError, RuntimeError, OSError):
+            # The pinned version may have been pruned from a shard: re-sync once
+            if self._sync_version().version == table.version:
+                raise
+            table = self.table
+            results = self._gather(lambda shard: shard.search(query_embedding, k, table.version))
+
+        latest = {r['latest'] for r in results}
+        if len(latest) == 1 and table.version not in latest:
+            # Every shard has the new version live, so later queries can all move to it
+            self._activate(latest.pop())
+        return table, merge_results(results, k)
+
+    def search_ids(self, query_embedding, k):
+        """Returns (version, [(score, global row id)]) for the global top k."""
+        table, hits = self._search_pinned(query_embedding, k)
+        return table.version, hits
+
+    def search(self, query_embedding, k):
+        """Returns (score, career) pairs for the global top k, best first."""
+        table, hits = self._search_pinned(query_embedding, k)
+        return [(score, table.careers[row]) for score, row in hits]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self._pool.shutdown(wait=False)
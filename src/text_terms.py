@@ -0,0 +1,10 @@
+import re
+
+# Words too common to say anything about a skill, interest or trait. Shared by the
+# roadmap's strength matching and the re-ranker's term matching.
+STOPWORDS = {'a', 'an', 'and', 'for', 'in', 'like', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+
+def content_words(text):
+    """Lower-cased words of text without stopwords, e.g. 'Law and Government' -> ['law', 'government']."""
+    return [w for w in re.split(r'[^a-z0-9+#]+', text.lower()) if w and w not in STOPWORDS]
@@ -0,0 +1,159 @@
+import hashlib
+import io
+import os
+from functools import lru_cache
+from string import Formatter
+
+import numpy as np
+
+from index_bundle import atomic_write_bytes
+
+# --- Configuration ---
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'results')
+TOKENS_FILE = os.path.join(RESULTS_DIR, 'onet_tokens.npz')
+LIST_SEPARATOR = ", "
+ENCODE_BATCH_SIZE = 64
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class CachedTokenizer:
+    """
+    Wraps a SentenceTransformer's tokenizer so repeated text fragments (template
+    words, common interests, strengths, traits) are tokenized once and reused.
+
+    For WordPiece-style tokenizers, which split on whitespace and punctuation
+    before sub-word tokenization, joining the ids of fragments that meet at such a
+    boundary gives exactly the ids of the joined text. That is checked once at
+    start-up; if it does not hold, every call falls back to plain tokenization.
+    """
+
+    def __init__(self, model, cache_size=8192):
+        self.model = model
+        self.tokenizer = model.tokenizer
+        self.max_length = model.max_seq_length
+        self._fragment_ids = lru_cache(maxsize=cache_size)(self._tokenize_fragment)
+        self._uses_token_types = 'token_type_ids' in getattr(self.tokenizer, 'model_input_names', [])
+        self.composable = self._check_composable()
+
+    def _tokenize_fragment(self, fragment):
+        return tuple(self.tokenizer.encode(fragment, add_special_tokens=False))
+
+    def _check_composable(self):
+        parts = ["A person with an academic background in ", "computer science", ", with interests in ",
+                 "art", LIST_SEPARATOR, "machine learning", ". Their strengths are ", "problem-solving", "."]
+        assembled = [i for part in parts for i in self._fragment_ids(part)]
+        return assembled == list(self._tokenize_fragment(''.join(parts)))
+
+    def _with_special_tokens(self, ids):
+        ids = list(ids)[:self.max_length - 2]
+        return [self.tokenizer.cls_token_id] + ids + [self.tokenizer.sep_token_id]
+
+    def ids_for_text(self, text):
+        """Input ids (with special tokens, truncated) for one full text."""
+        return self._with_special_tokens(self._tokenize_fragment(text))
+
+    def ids_for_template(self, template, values):
+        """
+        Input ids for template.format(**values), built from cached fragments.
+        List values are joined with ", " just like the plain string version.
+        """
+        if not self.composable:
+            return self.ids_for_text(render_template(template, values))
+        ids = []
+        for literal, field, _, _ in Formatter().parse(template):
+            if literal:
+                ids.extend(self._fragment_ids(literal))
+            if field is None:
+                continue
+            value = values[field]
+            if isinstance(value, (list, tuple)):
+                for i, item in enumerate(value):
+                    if i:
+                        ids.extend(self._fragment_ids(LIST_SEPARATOR))
+                    ids.extend(self._fragment_ids(item))
+            else:
+                ids.extend(self._fragment_ids(value))
+        return self._with_special_tokens(ids)
+
+    def encode_ids(self, batch_ids, batch_size=ENCODE_BATCH_SIZE):
+        """Runs the model on pre-tokenized inputs and returns float32 embeddings."""
+        import torch
+
+        self.model.eval()
+        embeddings = [None] * len(batch_ids)
+        # Sort by length so each padded batch wastes as little as possible
+        order = sorted(range(len(batch_ids)), key=lambda i: len(batch_ids[i]))
+        device = self.model.device
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            width = max(len(batch_ids[i]) for i in chunk)
+            input_ids = np.full((len(chunk), width), self.tokenizer.pad_token_id, dtype=np.int64)
+            attention_mask = np.zeros((len(chunk), width), dtype=np.int64)
+            for row, i in enumerate(chunk):
+                input_ids[row, :len(batch_ids[i])] = batch_ids[i]
+                attention_mask[row, :len(batch_ids[i])] = 1
+            features = {
+                'input_ids': torch.from_numpy(input_ids).to(device),
+                'attention_mask': torch.from_numpy(attention_mask).to(device),
+            }
+            if self._uses_token_types:
+                features['token_type_ids'] = torch.zeros_like(features['input_ids'])
+            with torch.no_grad():
+                output = self.model(features)['sentence_embedding'].cpu().numpy()
+            for row, i in enumerate(chunk):
+                embeddings[i] = output[row]
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+def render_template(template, values):
+    return template.format(**{
+        key: LIST_SEPARATOR.join(value) if isinstance(value, (list, tuple)) else value
+        for key, value in values.items()
+    })
+
+
+# --- Pre-tokenized corpus ---
+
+def load_token_cache(cache_key, path=TOKENS_FILE):
+    """Returns {text hash: input ids} saved by a previous build with the same cache key."""
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        if str(data['cache_key']) != cache_key:
+            return {}
+        ids, offsets, hashes = data['ids'], data['offsets'], data['hashes']
+    return {h: ids[offsets[i]:offsets[i + 1]].tolist() for i, h in enumerate(hashes)}
+
+
+def save_token_cache(cache_key, hashes, batch_ids, path=TOKENS_FILE):
+    """Stores every text's input ids as one flat int32 array plus row offsets."""
+    offsets = np.zeros(len(batch_ids) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(ids) for ids in batch_ids])
+    flat = np.fromiter((i for ids in batch_ids for i in ids), dtype=np.int32, count=int(offsets[-1]))
+    buffer = io.BytesIO()
+    np.savez(buffer, cache_key=np.array(cache_key), ids=flat, offsets=offsets, hashes=np.array(hashes))
+    atomic_write_bytes(path, buffer.getvalue())
+
+
+def tokenize_corpus(tokenizer, texts, model_name, path=TOKENS_FILE):
+    """
+    Tokenizes a corpus, reusing ids saved by earlier builds for unchanged texts,
+    and saves the result. Returns (input ids per text, number of cache hits).
+    """
+    # Ids depend on both the vocabulary and the truncation length
+    cache_key = f"{model_name}:{tokenizer.max_length}"
+    cache = load_token_cache(cache_key, path)
+    hashes = [text_hash(text) for text in texts]
+    batch_ids, hits = [], 0
+    for text, h in zip(texts, hashes):
+        ids = cache.get(h)
+        if ids is None:
+            ids = tokenizer.ids_for_text(text)
+        else:
+            hits += 1
+        batch_ids.append(ids)
+    save_token_cache(cache_key, hashes, batch_ids, path)
+    return batch_ids, hits
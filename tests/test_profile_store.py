@@ -0,0 +1,109 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import profile_store  # noqa: E402
+from profile_store import ProfileStore  # noqa: E402
+
+DIMENSION = 16
+DAY = 24 * 3600
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profile_store, 'time', clock)
+    return clock
+
+
+def unit_vectors(rng, count):
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add_user(store, user_id, vector):
+    # Each user is served a career named after them, so similar_choices reveals the neighbours
+    store.add(user_id, vector, {'user': user_id}, [{'onet_soc_code': user_id, 'title': user_id}])
+
+
+def neighbour_ids(store, query, k):
+    return {career['onet_soc_code'] for career, _ in store.similar_choices(query, k=k, top_n=k + 1)}
+
+
+def brute_force_ids(store, query, k):
+    live = {user: store.get(user)[0][0] for user in store._latest}
+    users = list(live)
+    scores = np.stack([live[user] for user in users]) @ query[0]
+    return {users[i] for i in np.argsort(-scores)[:k + 1]}
+
+
+def test_masked_search_matches_brute_force_over_latest_rows(tmp_path, clock):
+    rng = np.random.default_rng(3)
+    store = ProfileStore(DIMENSION, str(tmp_path))
+    for i, vector in enumerate(unit_vectors(rng, 300)):
+        add_user(store, f"u{i}", vector)
+    # Returning users leave superseded rows in the index
+    for i, vector in zip(range(0, 300, 3), unit_vectors(rng, 100)):
+        add_user(store, f"u{i}", vector)
+    assert store._index.ntotal == 400
+
+    for query in unit_vectors(rng, 20):
+        query = query.reshape(1, -1)
+        assert neighbour_ids(store, query, 20) == brute_force_ids(store, query, 20)
+
+    reloaded = ProfileStore(DIMENSION, str(tmp_path))
+    query = unit_vectors(rng, 1)
+    assert neighbour_ids(reloaded, query, 20) == brute_force_ids(store, query, 20)
+
+
+def test_over_budget_evicts_oldest_users_to_low_water_mark(tmp_path, clock, monkeypatch):
+    compactions = []
+    compact = ProfileStore._compact
+    monkeypatch.setattr(ProfileStore, '_compact', lambda self: (compactions.append(len(self)), compact(self)))
+
+    store = ProfileStore(DIMENSION, str(tmp_path), max_profiles=100)
+    vectors = unit_vectors(np.random.default_rng(5), 111)
+    for i in range(101):
+        clock.now += 1
+        add_user(store, f"u{i}", vectors[i])
+    assert compactions == [101]
+    assert len(store) == 90
+    assert store.get('u10') is None and store.get('u11') is not None
+
+    # The next ten new users fit under the cap without another compaction
+    for i in range(101, 111):
+        clock.now += 1
+        add_user(store, f"u{i}", vectors[i])
+    assert compactions == [101]
+    assert len(store) == 100
+
+
+def test_expired_profiles_are_not_similar_students(tmp_path, clock):
+    rng = np.random.default_rng(9)
+    store = ProfileStore(DIMENSION, str(tmp_path), max_age_days=30)
+    vectors = unit_vectors(rng, 20)
+    for i in range(10):
+        add_user(store, f"old{i}", vectors[i])
+    clock.now += 31 * DAY
+    for i in range(10, 20):
+        add_user(store, f"new{i}", vectors[i])
+
+    # Nothing has been compacted, but the expired users are no longer candidates
+    assert store._index.ntotal == 20
+    query = vectors[[0]]
+    assert neighbour_ids(store, query, 20) == {f"new{i}" for i in range(10, 20)}
+
+    clock.now += 31 * DAY
+    assert store.similar_choices(query) == []
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import query_colleges  # noqa: E402
+from query_colleges import get_colleges_for_text, parse_budget_inr  # noqa: E402
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('3 lakh', 3e5),
+    ('250000', 250000),
+    ('2,50,000 per year', 250000),
+    ('2.5L per year', 2.5e5),
+    ('4-5 lakh', 5e5),
+    ('4 to 5 lakhs', 5e5),
+    ('2 lakh - 3 lakh', 3e5),
+    ('5 lpa', 5e5),
+    ('50k', 5e4),
+    ('1.2 crore', 1.2e7),
+    ('rs 300000', 3e5),
+])
+def test_parse_budget_inr(text, expected):
+    assert parse_budget_inr(text) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('text', [None, '', 'no budget', 'around 2 years of savings', '3 kids'])
+def test_parse_budget_inr_without_a_known_amount(text):
+    assert parse_budget_inr(text) is None
+
+
+class FakeModel:
+    def __init__(self, query):
+        self.query = query
+
+    def encode(self, texts, convert_to_numpy=True):
+        return self.query.copy()
+
+
+def test_cost_weight_reorders_but_keeps_similarity_as_match_score(monkeypatch):
+    embeddings = np.eye(4, dtype=np.float32)
+    index = faiss.IndexFlatIP(4)
+    index.add(embeddings)
+    meta = [{'id': str(i), 'name': f"College {i}", 'city': 'x', 'state': 'y', 'programs': '', 'url': ''}
+            for i in range(4)]
+    numeric = {'total_cost': np.array([900000, 100000, 50000, 50000], dtype=np.float64)}
+    # College 0 is the closest match but by far the most expensive
+    query = np.array([[1.0, 0.8, 0.1, 0.0]], dtype=np.float32)
+    monkeypatch.setattr(query_colleges, 'load_resources', lambda: (FakeModel(query), index, meta, numeric))
+
+    similarity = (query / np.linalg.norm(query))[0] @ embeddings.T
+
+    plain = get_colleges_for_text('q', top_k=2)
+    weighted = get_colleges_for_text('q', top_k=2, cost_weight=1.0)
+
+    assert [c['name'] for c in plain] == ['College 0', 'College 1']
+    # The cost penalty pushes College 0 out of the top two ...
+    assert [c['name'] for c in weighted] == ['College 1', 'College 2']
+    # ... but match_score is still the plain similarity, never the penalised value
+    for college in plain + weighted:
+        assert college['match_score'] == round(float(similarity[int(college['id'])]), 2)
+        assert college['match_score'] > 0
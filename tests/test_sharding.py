@@ -0,0 +1,123 @@
+import os
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sharding import (  # noqa: E402
+    ShardCoordinator, ShardServer, ShardVersionError, list_shard_dirs, merge_results, write_shard_bundles,
+)
+
+NUM_CAREERS = 1000
+DIMENSION = 32
+NUM_SHARDS = 4
+K = 10
+
+
+def fixed_embeddings():
+    rng = np.random.default_rng(1234)
+    embeddings = rng.standard_normal((NUM_CAREERS, DIMENSION)).astype(np.float32)
+    # Exact duplicates in different shards, so some queries hit equal scores
+    embeddings[700] = embeddings[5]
+    embeddings[950] = embeddings[260]
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+
+def expected_rows(index, query, k):
+    """Single-index top k, with equal scores ordered by the lower row id like the coordinator."""
+    distances, indices = index.search(query, index.ntotal)
+    order = np.lexsort((indices[0], -distances[0]))[:k]
+    return distances[0][order], indices[0][order]
+
+
+@pytest.fixture(scope='module')
+def coordinator(tmp_path_factory):
+    shards_dir = str(tmp_path_factory.mktemp('shards'))
+    careers = [{'onet_soc_code': f"{row:02d}-0000.00", 'row': row} for row in range(NUM_CAREERS)]
+    write_shard_bundles(fixed_embeddings(), careers, 'test-model', NUM_SHARDS, shards_dir)
+    coordinator = ShardCoordinator.from_local_shards(shards_dir)
+    yield coordinator
+    coordinator.close()
+
+
+def test_sharded_search_matches_single_index(coordinator):
+    embeddings = fixed_embeddings()
+    index = faiss.IndexFlatIP(DIMENSION)
+    index.add(embeddings)
+
+    rng = np.random.default_rng(99)
+    queries = rng.standard_normal((50, DIMENSION)).astype(np.float32)
+    # Queries equal to a duplicated row put an exact tie at the top
+    queries = np.concatenate([queries, embeddings[[5, 260]]])
+    faiss.normalize_L2(queries)
+
+    for query in queries:
+        query = query.reshape(1, -1)
+        scores, rows = expected_rows(index, query, K)
+        hits = coordinator.search(query, K)
+        assert [career['row'] for _, career in hits] == rows.tolist()
+        np.testing.assert_allclose([score for score, _ in hits], scores, rtol=0, atol=1e-6)
+
+
+def test_exact_ties_are_ordered_by_row_id(coordinator):
+    query = fixed_embeddings()[[700]]
+    rows = [career['row'] for _, career in coordinator.search(query, 2)]
+    assert rows == [5, 700]
+
+
+def test_coordinator_hydrates_careers_table(coordinator):
+    assert coordinator.count == NUM_CAREERS
+    assert coordinator.model_name == 'test-model'
+    assert coordinator.careers_by_code['05-0000.00']['row'] == 5
+
+
+def test_merge_rejects_mixed_versions():
+    results = [
+        {'version': 'a', 'scores': [0.9], 'ids': [1]},
+        {'version': 'b', 'scores': [0.8], 'ids': [2]},
+    ]
+    with pytest.raises(ShardVersionError):
+        merge_results(results, 2)
+
+
+def test_staggered_shard_swap_keeps_serving_one_version(tmp_path):
+    shards_dir = str(tmp_path)
+    rng = np.random.default_rng(7)
+
+    def build(count, tag):
+        embeddings = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+        faiss.normalize_L2(embeddings)
+        careers = [{'onet_soc_code': f"{row:02d}-0000.00", 'tag': tag} for row in range(count)]
+        return embeddings, write_shard_bundles(embeddings, careers, 'test-model', NUM_SHARDS, shards_dir)
+
+    old_embeddings, old_version = build(200, 'old')
+    # In-process shards with no polling thread, so each swap happens exactly when the test says
+    servers = [ShardServer(d) for d in list_shard_dirs(shards_dir)]
+    for server in servers:
+        server.watcher.check_for_update()
+    coordinator = ShardCoordinator(servers, shards_dir=shards_dir)
+
+    new_embeddings, new_version = build(240, 'new')
+    servers[0].watcher.check_for_update()
+
+    # One shard has swapped: queries still answer from the old version, without errors
+    query = old_embeddings[[17]]
+    hits = coordinator.search(query, 3)
+    assert coordinator.version == old_version
+    assert {career['tag'] for _, career in hits} == {'old'}
+    assert hits[0][1]['onet_soc_code'] == '17-0000.00'
+
+    for server in servers[1:]:
+        server.watcher.check_for_update()
+    # This query is still answered from the old version; once every shard reports
+    # the new one live, the coordinator moves to it for the next query
+    assert {career['tag'] for _, career in coordinator.search(query, 3)} == {'old'}
+    hits = coordinator.search(new_embeddings[[230]], 3)
+    assert coordinator.version == new_version
+    assert coordinator.count == 240
+    assert {career['tag'] for _, career in hits} == {'new'}
+    assert hits[0][1]['onet_soc_code'] == '230-0000.00'